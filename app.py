@@ -1,13 +1,16 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 import logging
-import yaml
-import cv2
-import numpy as np
+import atexit
+import binascii
 import io
-import base64
 import time
-from PIL import Image
-from corpus_vision import VisionSystem
+from typing import Optional
+import msgspec
+from corpus_vision import VisionSystem, load_config
+from frame_utils import fit_max_side, jpeg_etag
+from jpeg_codec import encode_jpeg
+from fastjson import dumps, json_response
+from single_flight import SingleFlight
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -19,35 +22,132 @@ except Exception as e:
     logging.error(f"Failed to initialize vision system: {e}")
     vision = None
 
+# Release the camera on interpreter exit, whether run directly or under gunicorn
+if vision:
+    atexit.register(vision.cleanup)
+
+# Quality 85 keeps previews sharp while producing noticeably smaller buffers
+# than OpenCV's default of 95
+JPEG_QUALITY = 85
+
+# Request bodies are decoded and validated in one pass
+class StartLoopRequest(msgspec.Struct):
+    interval: Optional[float] = None
+
+class ConfigUpdate(msgspec.Struct):
+    interval: Optional[float] = None
+    first_person: Optional[bool] = None
+    speech_enabled: Optional[bool] = None
+
+def _decode_body(body_type):
+    body = request.get_data()
+    return msgspec.json.decode(body, type=body_type) if body else body_type()
+
+# Multiple of 3 so every chunk base64-encodes without padding
+_B64_CHUNK = 3 * 16384
+
+def _stream_capture_json(buffer, timestamp):
+    """Yield the /capture JSON body, base64-encoding the JPEG chunk by chunk"""
+    yield b'{"status":"success","image":"data:image/jpeg;base64,'
+    data = memoryview(buffer).cast('B')
+    for start in range(0, len(data), _B64_CHUNK):
+        yield binascii.b2a_base64(data[start:start + _B64_CHUNK], newline=False)
+    yield b'","timestamp":%d}' % timestamp
+
+# Serialized /status body, reused for health-check polling until it expires
+# or a state-changing endpoint invalidates it
+status_body = SingleFlight(ttl=0.5)
+
+# Serialized GET /config body; config only changes through this API
+config_body = SingleFlight(ttl=1.0)
+
+def _invalidate_responses():
+    status_body.clear()
+    config_body.clear()
+
 @app.route('/status', methods=['GET'])
 def status():
     if not vision:
         return jsonify({"error": "Vision system not initialized"}), 500
     
-    return jsonify({
+    body = status_body.do(lambda: dumps({
         "status": "running",
         "module": "corpus-vision",
         **vision.get_status()
-    })
+    }))
+    return Response(body, mimetype='application/json')
 
 @app.route('/capture', methods=['GET'])
 def capture():
     if not vision:
         return jsonify({"error": "Vision system not initialized"}), 500
     
-    image = vision.capture_image()
-    if image is None:
+    try:
+        max_side = int(request.args.get('max_side', 0))
+    except ValueError:
+        return jsonify({"error": "max_side must be an integer"}), 400
+    
+    if max_side > 0:
+        # Thumbnails: shrink before encoding so JPEG/base64 work scales with output size
+        image = vision.capture_image()
+        if image is None:
+            return jsonify({"error": "Failed to capture image"}), 500
+        buffer = encode_jpeg(fit_max_side(image, max_side), JPEG_QUALITY)
+    else:
+        buffer = vision.capture_jpeg(JPEG_QUALITY)
+    if buffer is None:
         return jsonify({"error": "Failed to capture image"}), 500
     
-    # Convert image to base64 for JSON response
-    _, buffer = cv2.imencode('.jpg', image)
-    img_base64 = base64.b64encode(buffer).decode('utf-8')
+    # Pollers that already hold this frame get a 304 instead of the payload.
+    # Both representations share the tag, so caches must key them on Accept
+    etag = jpeg_etag(buffer)
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.vary.add('Accept')
+        return response
     
-    return jsonify({
-        "status": "success",
-        "image": f"data:image/jpeg;base64,{img_base64}",
-        "timestamp": int(time.time())
-    })
+    # Clients that ask for image/jpeg get the raw bytes; JSON stays the
+    # default so existing callers sending */* are unaffected
+    if request.accept_mimetypes.best_match(['application/json', 'image/jpeg']) == 'image/jpeg':
+        response = Response(buffer, mimetype='image/jpeg')
+    else:
+        # Stream the base64 JPEG straight into the response body instead of
+        # building the encoded string and the JSON document in memory
+        # The grabber already stamped the frame; only read the clock without it
+        timestamp = vision.last_frame_time or time.time()
+        response = Response(_stream_capture_json(buffer, int(timestamp)), mimetype='application/json')
+    if etag:
+        response.set_etag(etag, weak=True)
+    response.vary.add('Accept')
+    return response
+
+@app.route('/capture/raw', methods=['GET'])
+def capture_raw():
+    if not vision:
+        return jsonify({"error": "Vision system not initialized"}), 500
+    
+    buffer = vision.capture_jpeg(JPEG_QUALITY)
+    if buffer is None:
+        return jsonify({"error": "Failed to capture image"}), 500
+    return send_file(io.BytesIO(buffer), mimetype='image/jpeg', max_age=0)
+
+_MJPEG_PART = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+def _mjpeg_stream():
+    while True:
+        buffer = vision.read_jpeg(JPEG_QUALITY)
+        if buffer is None:
+            break
+        yield _MJPEG_PART + buffer + b'\r\n'
+
+@app.route('/stream.mjpg', methods=['GET'])
+def stream_mjpg():
+    if not vision:
+        return jsonify({"error": "Vision system not initialized"}), 500
+    
+    # Live view for browsers and <img> tags; MJPEG cameras are relayed without re-encoding
+    return Response(_mjpeg_stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
@@ -64,7 +164,7 @@ def analyze():
     if description is None:
         return jsonify({"error": "Failed to analyze image"}), 500
     
-    return jsonify({
+    return json_response({
         "status": "success",
         "description": description,
         "timestamp": int(time.time())
@@ -79,25 +179,47 @@ def describe():
     if description is None:
         return jsonify({"error": "Failed to get description"}), 500
     
-    return jsonify({
+    return json_response({
         "status": "success",
         "description": description,
         "spoken": vision.config['speech']['enabled']
     })
 
+@app.route('/analyze_stream', methods=['GET'])
+def analyze_stream():
+    if not vision:
+        return jsonify({"error": "Vision system not initialized"}), 500
+    
+    # Latest result of the pipelined continuous loop; never blocks on the camera or provider
+    latest = vision.get_latest_description()
+    if latest is None:
+        return jsonify({"error": "No description yet - start the continuous loop"}), 404
+    
+    description, timestamp = latest
+    return json_response({
+        "status": "success",
+        "description": description,
+        "timestamp": int(timestamp),
+        "continuous_running": vision.continuous_running
+    })
+
 @app.route('/start_loop', methods=['POST'])
 def start_loop():
     if not vision:
         return jsonify({"error": "Vision system not initialized"}), 500
     
-    data = request.get_json() or {}
-    interval = data.get('interval', vision.config['vision']['interval'])
+    try:
+        req = _decode_body(StartLoopRequest)
+    except msgspec.DecodeError as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+    interval = req.interval if req.interval is not None else vision.config['vision']['interval']
     
     success = vision.start_continuous_vision(interval)
+    _invalidate_responses()
     if success:
-        return jsonify({
+        return json_response({
             "status": "success", 
-            "message": f"Started continuous vision (interval: {interval}s)"
+            "message": f"Started continuous vision (interval: {interval:g}s)"
         })
     else:
         return jsonify({"error": "Failed to start continuous vision"}), 500
@@ -108,6 +230,7 @@ def stop_loop():
         return jsonify({"error": "Vision system not initialized"}), 500
     
     success = vision.stop_continuous_vision()
+    _invalidate_responses()
     if success:
         return jsonify({"status": "success", "message": "Stopped continuous vision"})
     else:
@@ -119,38 +242,48 @@ def config():
         return jsonify({"error": "Vision system not initialized"}), 500
     
     if request.method == 'GET':
-        return jsonify(vision.config)
+        return Response(config_body.do(lambda: dumps(vision.config)), mimetype='application/json')
     
     # POST: Update configuration
-    data = request.get_json()
-    if not data:
-        return jsonify({"error": "No configuration data provided"}), 400
+    # Only an empty body or object is rejected; unknown keys are ignored
+    # and still get the success response, as before typed decoding
+    try:
+        body = request.get_data()
+        data = msgspec.json.decode(body) if body else None
+        if not data:
+            return jsonify({"error": "No configuration data provided"}), 400
+        update = msgspec.convert(data, ConfigUpdate)
+    except msgspec.DecodeError as e:
+        return jsonify({"error": f"Invalid configuration: {e}"}), 400
     
     # Update specific config values
-    if 'interval' in data:
-        vision.config['vision']['interval'] = data['interval']
-    if 'first_person' in data:
-        vision.config['vision']['first_person'] = data['first_person']
-    if 'speech_enabled' in data:
-        vision.config['speech']['enabled'] = data['speech_enabled']
+    if update.interval is not None:
+        vision.config['vision']['interval'] = update.interval
+    if update.first_person is not None:
+        vision.config['vision']['first_person'] = update.first_person
+    if update.speech_enabled is not None:
+        vision.config['speech']['enabled'] = update.speech_enabled
     
-    return jsonify({"status": "success", "message": "Configuration updated"})
+    # Prompt settings may have changed; cached descriptions are stale
+    vision.clear_description_cache()
+    _invalidate_responses()
+    
+    return json_response({"status": "success", "message": "Configuration updated"})
 
 if __name__ == '__main__':
-    # Load config for server settings
+    # Reuse the config VisionSystem already parsed for server settings
     try:
-        with open('config.yaml', 'r') as file:
-            config = yaml.safe_load(file)
+        config = vision.config if vision else load_config('config.yaml')
         api_config = config.get('api', {})
     except:
         api_config = {'host': '0.0.0.0', 'port': 5002}
     
-    try:
-        app.run(
-            host=api_config.get('host', '0.0.0.0'),
-            port=api_config.get('port', 5002),
-            debug=False
-        )
-    finally:
-        if vision:
-            vision.cleanup()
\ No newline at end of file
+    # Development server; see README for running under gunicorn
+    app.run(
+        host=api_config.get('host', '0.0.0.0'),
+        port=api_config.get('port', 5002),
+        debug=False,
+        # One thread per request: camera reads are serialized inside
+        # VisionSystem, provider calls overlap freely
+        threaded=True
+    )
\ No newline at end of file
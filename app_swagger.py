@@ -1,18 +1,21 @@
-from flask import Flask, request
+from flask import Flask, Response, request
 from flask_restx import Api, Resource, fields
 from flask_socketio import SocketIO, emit
 import logging
-import yaml
+import atexit
 import cv2
 import numpy as np
-import base64
+import binascii
 import time
 import threading
-import queue
-from corpus_vision import VisionSystem
+from typing import Optional
+from corpus_vision import VisionSystem, load_config
 from waldo_vision_logger import waldo_logger
 from continuous_waldo_monitor import waldo_monitor
 from event_store import store as event_store
+from fastjson import dumps, json_response
+from frame_utils import FILTER_SIZE
+from single_flight import SingleFlight
 
 # Import Rust filter
 try:
@@ -27,6 +30,8 @@ except ImportError:
 app = Flask(__name__)
 from ws_log_server import hub as ws_hub
 app.config['SECRET_KEY'] = 'corpus-vision-api'
+# Swagger UI's CSS/JS never change between deploys; let browsers keep them
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
 
 # Initialize SocketIO for WebSocket support
 socketio = SocketIO(app, cors_allowed_origins="*", ping_timeout=60, ping_interval=25)
@@ -51,6 +56,13 @@ api = Api(app,
     doc='/swagger'
 )
 
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    # Status and stream endpoints are polled during a stream; serialize with orjson when available
+    response = Response(dumps(data), status=code, mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
+
 logging.basicConfig(level=logging.INFO)
 # Start raw WebSocket log server on dedicated port (default 5010)
 try:
@@ -63,10 +75,7 @@ try:
     vision = VisionSystem()
     
     # Configure for 4K @ 30fps
-    if vision.camera:
-        vision.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 3840)
-        vision.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 2160)  
-        vision.camera.set(cv2.CAP_PROP_FPS, 30)
+    if vision.configure_camera(3840, 2160, 30):
         logging.info("Camera configured for 4K @ 30fps")
         
 except Exception as e:
@@ -78,14 +87,18 @@ class StreamingManager:
     def __init__(self):
         self.streaming = False
         self.filter = None
-        self.frame_queue = queue.Queue(maxsize=20)
         self.client_count = 0
         self.config = {
             'frame_interval_ms': 33,    # 30fps
             'change_threshold': 5.0,    # 5% change
-            'filter_enabled': True
+            'filter_enabled': True,
+            'filter_downscale': list(FILTER_SIZE)  # filter input size (width, height)
         }
-        self.stats = {'frames': 0, 'triggers': 0, 'saved': 0, 'start': None}
+        # Counters as int attributes; start_ns is time.monotonic_ns(), 0 until streaming starts
+        self.frames = 0
+        self.triggers = 0
+        self.saved = 0
+        self.start_ns = 0
     
     def initialize_filter(self):
         if FILTER_AVAILABLE:
@@ -99,6 +112,25 @@ class StreamingManager:
 
 streaming = StreamingManager()
 
+def _shutdown():
+    # Stop the monitor before releasing the camera it reads from
+    waldo_monitor.stop_monitoring()
+    streaming.streaming = False
+    if vision:
+        vision.cleanup()
+
+# Runs on interpreter exit, whether started directly or under gunicorn
+atexit.register(_shutdown)
+
+# Concurrent /describe_filtered callers share one capture and provider call
+filtered_describer = SingleFlight(ttl=1.0)
+
+# Serialized /status body, rebuilt at most every 0.5s for pollers and
+# cleared by the endpoints that change what it reports
+status_body = SingleFlight(ttl=0.5)
+# Serialized GET /config body; config only changes through this API
+config_body = SingleFlight(ttl=1.0)
+
 # Define API models
 loop_model = api.model('LoopRequest', {
     'interval': fields.Integer(description='Seconds between descriptions', example=5, default=5)
@@ -119,18 +151,31 @@ QUALITY_PRESETS = {
     'legacy_720p': {'width': 1280, 'height': 720, 'fps': 10, 'interval_ms': 100, 'description': '720p @ 10fps (Legacy)'}
 }
 
+# Derived once at import; the camera endpoints are polled during streaming
+PRESET_NAMES = list(QUALITY_PRESETS.keys())
+INVALID_PRESET_ERROR = {"error": f"Invalid preset. Choose from: {PRESET_NAMES}"}
+AVAILABLE_PRESETS_RENDERED = {
+    preset: f"{config['width']}x{config['height']} @ {config['fps']}fps"
+    for preset, config in QUALITY_PRESETS.items()
+}
+# First preset wins for shared dimensions, matching the old linear scan
+PRESET_BY_DIMS = {}
+for _preset, _config in QUALITY_PRESETS.items():
+    PRESET_BY_DIMS.setdefault((_config['width'], _config['height'], _config['fps']), _preset)
+
 stream_config_model = api.model('StreamConfigRequest', {
     'quality_preset': fields.String(description='Quality and frame rate preset', 
-                                   enum=list(QUALITY_PRESETS.keys()), example='smooth_480p'),
+                                   enum=PRESET_NAMES, example='smooth_480p'),
     'frame_interval_ms': fields.Integer(description='Custom milliseconds between frames', example=33, enum=[33, 50, 100, 150, 200, 250, 500, 1000]),
     'change_threshold': fields.Float(description='Percentage change to trigger AI analysis', example=5.0, enum=[1.0, 2.5, 5.0, 7.5, 10.0, 15.0, 20.0]),
     'filter_enabled': fields.Boolean(description='Enable intelligent change detection filter', example=True),
-    'buffer_duration_ms': fields.Integer(description='Frame comparison window duration', example=100, enum=[50, 100, 150, 200])
+    'buffer_duration_ms': fields.Integer(description='Frame comparison window duration', example=100, enum=[50, 100, 150, 200]),
+    'filter_downscale': fields.List(fields.Integer, description='Filter input size [width, height]', example=[320, 180])
 })
 
 camera_config_model = api.model('CameraConfigRequest', {
     'quality_preset': fields.String(description='Camera quality preset', 
-                                   enum=list(QUALITY_PRESETS.keys()), example='smooth_480p'),
+                                   enum=PRESET_NAMES, example='smooth_480p'),
     'width': fields.Integer(description='Custom width (overrides preset)', example=640),
     'height': fields.Integer(description='Custom height (overrides preset)', example=480),
     'fps': fields.Integer(description='Custom FPS (overrides preset)', example=30)
@@ -200,11 +245,12 @@ class Status(Resource):
         if not vision:
             return {"error": "Vision system not initialized"}, 500
         
-        return {
+        body = status_body.do(lambda: dumps({
             "status": "running",
             "module": "corpus-vision",
             **vision.get_status()
-        }
+        }))
+        return Response(body, mimetype='application/json')
 
 @api.route('/capture')
 class Capture(Resource):
@@ -215,19 +261,57 @@ class Capture(Resource):
         if not vision:
             return {"error": "Vision system not initialized"}, 500
         
-        image = vision.capture_image()
-        if image is None:
+        buffer = vision.capture_jpeg(85)
+        if buffer is None:
             return {"error": "Failed to capture image"}, 500
         
-        # Convert image to base64 for JSON response
-        _, buffer = cv2.imencode('.jpg', image)
-        img_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        return {
+        # Hand back the serialized body directly so flask_restx skips its
+        # representation pass over the 200-400 KB image string
+        img_base64 = binascii.b2a_base64(buffer, newline=False).decode('ascii')
+        return json_response({
             "status": "success",
-            "image": f"data:image/jpeg;base64,{img_base64}",
+            "image": "data:image/jpeg;base64," + img_base64,
             "timestamp": int(time.time())
-        }
+        })
+
+@api.route('/capture.jpg')
+class CaptureJpeg(Resource):
+    @api.produces(['image/jpeg'])
+    @api.response(200, 'JPEG image')
+    @api.response(500, 'Internal Server Error', error_response)
+    def get(self):
+        """Capture current camera image as a JPEG (preferred over base64 /capture)"""
+        if not vision:
+            return {"error": "Vision system not initialized"}, 500
+        
+        buffer = vision.capture_jpeg(85)
+        if buffer is None:
+            return {"error": "Failed to capture image"}, 500
+        
+        return Response(buffer, mimetype='image/jpeg')
+
+_MJPEG_PART = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+def _mjpeg_stream():
+    # read_jpeg waits for the grabber's next frame, so a slow client simply
+    # skips frames instead of queueing them
+    while True:
+        buffer = vision.read_jpeg(85)
+        if buffer is None:
+            break
+        yield _MJPEG_PART + buffer + b'\r\n'
+
+@api.route('/stream.mjpg')
+class StreamMjpeg(Resource):
+    @api.produces(['multipart/x-mixed-replace'])
+    @api.response(200, 'MJPEG stream')
+    @api.response(500, 'Internal Server Error', error_response)
+    def get(self):
+        """Live MJPEG preview for browsers and <img> tags (replaces polling /capture)"""
+        if not vision:
+            return {"error": "Vision system not initialized"}, 500
+        
+        return Response(_mjpeg_stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @api.route('/analyze')
 class Analyze(Resource):
@@ -285,6 +369,8 @@ class StartLoop(Resource):
         interval = data.get('interval', vision.config['vision']['interval'])
         
         success = vision.start_continuous_vision(interval)
+        status_body.clear()
+        config_body.clear()
         if success:
             return {
                 "status": "success", 
@@ -303,6 +389,7 @@ class StopLoop(Resource):
             return {"error": "Vision system not initialized"}, 500
         
         success = vision.stop_continuous_vision()
+        status_body.clear()
         if success:
             return {"status": "success", "message": "Stopped continuous vision"}
         else:
@@ -319,7 +406,7 @@ class Config(Resource):
         """Get current vision configuration"""
         if not vision:
             return {"error": "Vision system not initialized"}, 500
-        return vision.config
+        return Response(config_body.do(lambda: dumps(vision.config)), mimetype='application/json')
     
     def post(self):
         """Update vision configuration settings"""
@@ -337,6 +424,8 @@ class Config(Resource):
             vision.config['vision']['first_person'] = data['first_person']
         if 'speech_enabled' in data:
             vision.config['speech']['enabled'] = data['speech_enabled']
+        status_body.clear()
+        config_body.clear()
         
         return {"status": "success", "message": "Configuration updated"}
 
@@ -351,7 +440,9 @@ class DescribeFiltered(Resource):
         
         # Use Waldo Vision filter if available
         filter_obj = streaming.filter if streaming.filter else None
-        description = vision.get_filtered_view_description(filter_obj)
+        description = filtered_describer.do(
+            lambda: vision.get_filtered_view_description(filter_obj, streaming.config['filter_downscale'])
+        )
         
         return {
             "status": "success" if description else "no_trigger",
@@ -360,6 +451,27 @@ class DescribeFiltered(Resource):
             "waldo_vision_active": FILTER_AVAILABLE and streaming.filter is not None
         }
 
+def _positive_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+def _stream_config_error(data) -> Optional[str]:
+    """Why a stream config update is invalid, or None; a bad value here would
+    break every later filter pass, so it is rejected before anything is applied"""
+    for key in ('frame_interval_ms', 'buffer_duration_ms'):
+        if key in data and not _positive_int(data[key]):
+            return f"{key} must be a positive integer"
+    if 'change_threshold' in data:
+        value = data['change_threshold']
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            return "change_threshold must be a non-negative number"
+    if 'filter_enabled' in data and not isinstance(data['filter_enabled'], bool):
+        return "filter_enabled must be a boolean"
+    if 'filter_downscale' in data:
+        size = data['filter_downscale']
+        if not isinstance(size, list) or len(size) != 2 or not all(_positive_int(v) for v in size):
+            return "filter_downscale must be [width, height] with two positive integers"
+    return None
+
 @api.route('/stream/config')
 class StreamConfig(Resource):
     @api.expect(stream_config_model)
@@ -374,11 +486,14 @@ class StreamConfig(Resource):
         data = request.get_json()
         if not data:
             return {"error": "No configuration data provided"}, 400
+        error = _stream_config_error(data)
+        if error:
+            return {"error": error}, 400
         
         old_config = streaming.config.copy()
         
         # Update streaming configuration
-        for key in ['frame_interval_ms', 'change_threshold', 'filter_enabled', 'buffer_duration_ms']:
+        for key in ['frame_interval_ms', 'change_threshold', 'filter_enabled', 'buffer_duration_ms', 'filter_downscale']:
             if key in data:
                 streaming.config[key] = data[key]
         
@@ -448,19 +563,20 @@ class StreamStatus(Resource):
     def get(self):
         """Get WebSocket streaming status and performance metrics"""
         performance = {}
-        if streaming.stats['start']:
-            uptime = time.time() - streaming.stats['start']
-            fps = streaming.stats['frames'] / uptime if uptime > 0 else 0
-            trigger_rate = (streaming.stats['triggers'] / streaming.stats['frames'] * 100) if streaming.stats['frames'] > 0 else 0
+        if streaming.start_ns:
+            frames, triggers, saved = streaming.frames, streaming.triggers, streaming.saved
+            uptime = (time.monotonic_ns() - streaming.start_ns) / 1e9
+            fps = frames / uptime if uptime > 0 else 0
+            trigger_rate = (triggers / frames * 100) if frames > 0 else 0
             
             performance = {
                 'uptime_seconds': round(uptime, 1),
                 'capture_fps': round(fps, 1),
-                'frames_processed': streaming.stats['frames'],
-                'ai_triggers': streaming.stats['triggers'],
-                'api_calls_saved': streaming.stats['saved'],
+                'frames_processed': frames,
+                'ai_triggers': triggers,
+                'api_calls_saved': saved,
                 'trigger_rate_percent': round(trigger_rate, 1),
-                'efficiency_percent': round((streaming.stats['saved'] / max(streaming.stats['frames'], 1)) * 100, 1)
+                'efficiency_percent': round((saved / max(frames, 1)) * 100, 1)
             }
         
         return {
@@ -556,7 +672,7 @@ class MonitorStatus(Resource):
 @api.route('/camera/config') 
 class CameraConfig(Resource):
     @api.doc(params={
-        'quality_preset': {'description': 'Camera quality preset', 'enum': list(QUALITY_PRESETS.keys()), 'required': False}
+        'quality_preset': {'description': 'Camera quality preset', 'enum': PRESET_NAMES, 'required': False}
     })
     @api.response(200, 'Success', success_response)
     @api.response(400, 'Bad Request', error_response)
@@ -571,15 +687,13 @@ class CameraConfig(Resource):
             return {"error": "Missing 'quality_preset' parameter"}, 400
         
         if preset not in QUALITY_PRESETS:
-            return {"error": f"Invalid preset. Choose from: {list(QUALITY_PRESETS.keys())}"}, 400
+            return INVALID_PRESET_ERROR, 400
         
         try:
             preset_config = QUALITY_PRESETS[preset]
             
             # Apply camera settings
-            vision.camera.set(cv2.CAP_PROP_FRAME_WIDTH, preset_config['width'])
-            vision.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, preset_config['height'])
-            vision.camera.set(cv2.CAP_PROP_FPS, preset_config['fps'])
+            vision.configure_camera(preset_config['width'], preset_config['height'], preset_config['fps'])
             
             # Verify what the camera actually applied
             actual_width = int(vision.camera.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -631,23 +745,11 @@ class CameraStatus(Resource):
             current_height = int(vision.camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
             current_fps = int(vision.camera.get(cv2.CAP_PROP_FPS))
             
-            # Find matching preset
-            current_preset = None
-            for preset_name, preset_config in QUALITY_PRESETS.items():
-                if (preset_config['width'] == current_width and 
-                    preset_config['height'] == current_height and
-                    preset_config['fps'] == current_fps):
-                    current_preset = preset_name
-                    break
-            
             return {
                 "current_resolution": f"{current_width}x{current_height}",
                 "current_fps": current_fps,
-                "current_preset": current_preset or "custom",
-                "available_presets": {
-                    preset: f"{config['width']}x{config['height']} @ {config['fps']}fps"
-                    for preset, config in QUALITY_PRESETS.items()
-                },
+                "current_preset": PRESET_BY_DIMS.get((current_width, current_height, current_fps), "custom"),
+                "available_presets": AVAILABLE_PRESETS_RENDERED,
                 "streaming_interval_ms": streaming.config['frame_interval_ms'],
                 "camera_model": "Logitech BRIO 4K"
             }
@@ -696,28 +798,33 @@ class EventsContext(Resource):
         ctx = event_store.context(window_minutes=window, limit=limit)
         return ctx
 
+@api.route('/events/last_frame')
+class EventsLastFrame(Resource):
+    @api.produces(['image/jpeg'])
+    @api.response(200, 'JPEG of the most recent event window frame')
+    @api.response(404, 'No event yet', error_response)
+    def get(self):
+        """Frame behind the latest waldo_event broadcast, fetched on demand"""
+        jpeg = waldo_monitor.last_event_jpeg(85)
+        if jpeg is None:
+            return {"error": "No event frame available"}, 404
+        return Response(jpeg, mimetype='image/jpeg')
+
 
 if __name__ == '__main__':
-    # Load config for server settings
+    # Reuse the config VisionSystem already parsed for server settings
     try:
-        with open('config.yaml', 'r') as file:
-            config = yaml.safe_load(file)
+        config = vision.config if vision else load_config('config.yaml')
         api_config = config.get('api', {})
     except:
         api_config = {'host': '0.0.0.0', 'port': 5002}
     
-    try:
-        # Use SocketIO to run the app (supports both HTTP and WebSocket)
-        socketio.run(
-            app,
-            host=api_config.get('host', '0.0.0.0'),
-            port=api_config.get('port', 5002),
-            debug=False,
-            allow_unsafe_werkzeug=True
-        )
-
-    finally:
-        if vision:
-            vision.cleanup()
-        if streaming.streaming:
-            streaming.streaming = False
+    # Development server (supports both HTTP and WebSocket); see README for
+    # running under gunicorn
+    socketio.run(
+        app,
+        host=api_config.get('host', '0.0.0.0'),
+        port=api_config.get('port', 5002),
+        debug=False,
+        allow_unsafe_werkzeug=True
+    )
@@ -18,7 +18,6 @@
 
 # CAVEATS & WARNINGS:
 # - Camera sharing requires careful initialization order (main service first)
-# - Fast capture bypasses buffer flushing (may get slightly stale frames)
 # - Monitoring thread can fail silently if camera becomes unavailable
 # - Speech integration depends on external service availability (port 5001)
 # - Memory usage grows with processing time (no automatic garbage collection)
@@ -27,16 +26,17 @@
 # - Hardcoded frame quality settings (80% JPEG) not configurable via API
 
 import cv2
-import base64
 import numpy as np
 import time
 import threading
+import queue
 import logging
-from datetime import datetime
 from corpus_vision import VisionSystem
 from waldo_vision_logger import waldo_logger
 from event_store import store as event_store
 from ingest_publisher import publisher as ingest_publisher
+from frame_utils import FILTER_SIZE, reduced_gray_flag, run_filter
+from jpeg_codec import encode_jpeg
 import os
 try:
     from ws_log_server import hub as ws_hub
@@ -49,27 +49,66 @@ try:
 except ImportError:
     FILTER_AVAILABLE = False
 
+def _iso_utc(ts: float) -> str:
+    """UTC ISO-8601 with milliseconds, formatted without building a datetime"""
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(ts)) + '.%03dZ' % (int(ts * 1000) % 1000)
+
+
+def _word_set(text):
+    return set(text.lower().split())
+
+
+def _jaccard(a, b):
+    """Word-set overlap; linear in the description length unlike difflib's ratio"""
+    return len(a & b) / max(1, len(a | b))
+
+
 class ContinuousWaldoMonitor:
+    # Event window limits in monotonic ns: a window closes after 5 s regardless,
+    # or once triggers stop for 0.25 s
+    AGG_MAX_NS = 5_000_000_000
+    AGG_QUIET_NS = 250_000_000
+    # Seconds stop_monitoring waits for each worker thread
+    STOP_JOIN_TIMEOUT = 10.0
+    
     def __init__(self, shared_vision_system=None):
         self.vision = shared_vision_system  # Use shared camera instead of creating new one
         self.filter = None
         self.monitoring = False
         self.monitor_thread = None
-        self.stats = {
-            'frames_processed': 0,
-            'triggers': 0,
-            'api_saves': 0,
-            'start_time': None
-        }
+        self._stop_event = threading.Event()  # Wakes the worker out of error backoff on stop
+        # Closed event windows wait here for the analysis thread
+        self._analysis_queue = queue.Queue(maxsize=4)
+        self.analysis_thread = None
+        # Newest closed window's frame; encoded to JPEG only when someone asks
+        self.last_event_frame = None
+        self._last_event_jpeg = None  # (frame, quality, jpeg)
+        # Per-frame counters as plain int attributes; get_status() packs them
+        self.frames_processed = 0
+        self.triggers = 0
+        self.api_saves = 0
+        self.frames_dropped = 0  # grabbed frames the monitor fell too far behind to see
+        self.start_time = None
         # Aggregation window state
         self._agg_active = False
+        # Window timing runs on integer monotonic ns so wall-clock steps (NTP)
+        # cannot stretch or cut a window; _agg_start_ts is the wall time for the record
+        self._agg_start_ns = 0
         self._agg_start_ts = 0.0
-        self._agg_last_trigger_ts = 0.0
-        self._agg_frames_b64 = []
-        self._agg_max_duration = 5.0  # seconds
-        self._quiet_threshold = 0.5    # seconds
+        self._agg_last_trigger_ns = 0
+        # Only the newest triggering frame is analyzed, so only it is kept
+        # (in a buffer reused within the window) along with the frame count
+        self._agg_last_frame = None
+        self._agg_frame_count = 0
         self._last_summary_text = None
+        self._last_summary_words = None  # word set of _last_summary_text for the novelty check
         self._last_summary_ts = 0.0
+        # Process every Nth camera frame; the ones in between are never decoded
+        self.decode_stride = 1
+        self._jpeg_quality = 80
+        # Grayscale thumbnail size (width, height) the filter sees
+        self.filter_size = FILTER_SIZE
+        self._gray_decode_flag = cv2.IMREAD_GRAYSCALE
         
     def initialize(self, shared_vision_system):
         """Initialize with shared vision system to avoid camera conflicts"""
@@ -82,6 +121,17 @@ class ContinuousWaldoMonitor:
                 return False
             
             waldo_logger.logger.info("📹 Using shared camera for continuous monitoring")
+            monitor_config = self.vision.config.get('monitor', {})
+            self.decode_stride = max(1, int(monitor_config.get('decode_stride', 1)))
+            self.filter_size = tuple(monitor_config.get('filter_size', FILTER_SIZE))
+            
+            # Unflushed reads are only fresh if the driver queues a single frame
+            if self.vision.ensure_single_buffer() != 1:
+                waldo_logger.logger.warning("⚠️ Camera ignores CAP_PROP_BUFFERSIZE; frames may lag by a few buffers")
+            
+            # With capture_format: mjpeg the filter's thumbnail is decoded straight from the
+            # camera JPEG in grayscale, at the coarsest scale that still covers filter_size
+            self._gray_decode_flag = reduced_gray_flag(self.vision.frame_size(), self.filter_size)
             
             # Initialize Waldo Vision filter
             if FILTER_AVAILABLE:
@@ -114,49 +164,95 @@ class ContinuousWaldoMonitor:
         if self.monitoring:
             waldo_logger.logger.warning("⚠️ Monitoring already active")
             return False
+        # A worker still finishing the last run's provider call would share
+        # the queue and stop event with the new threads
+        if any(t is not None and t.is_alive() for t in (self.monitor_thread, self.analysis_thread)):
+            waldo_logger.logger.warning("⚠️ Previous monitoring threads still stopping; try again shortly")
+            return False
         
         if not self.initialize(shared_vision_system):
             return False
         
         self.monitoring = True
-        self.stats['start_time'] = time.time()
+        self._stop_event.clear()
+        self.start_time = time.time()
         self._reset_stats()
         
         def continuous_monitor_worker():
             waldo_logger.logger.info("🚀 Starting continuous video feed monitoring")
+            frame_buf = None  # Refilled in place by each read when the size matches
+            last_seq = 0
+            consecutive_errors = 0
+            # Bound once: these lookups would otherwise repeat on every frame
+            stopped = self._stop_event.is_set
+            stopped_wait = self._stop_event.wait
+            analysis_queue = self._analysis_queue
+            log = waldo_logger.logger
+            agg_max_ns, agg_quiet_ns = self.AGG_MAX_NS, self.AGG_QUIET_NS
+            read_raw_seq = self.vision.read_raw_seq
+            is_compressed = self.vision.is_compressed
             
-            while self.monitoring:
-                current_time = time.time()  # Need this for timestamps
+            while not stopped():
+                if analysis_queue.full() and not self._agg_active:
+                    # Another closed window would only be dropped, so the filter
+                    # work is wasted; idle until the analysis thread catches up
+                    stopped_wait(0.1)
+                    last_seq = 0  # the gap is not a missed-frame drop
+                    continue
+                now_ns = time.monotonic_ns()
                 try:
                     # DEBUG: Log every 30 frames (every ~1 second)
-                    if self.stats['frames_processed'] % 30 == 0:
-                        waldo_logger.logger.info(f"📹 Processing frame #{self.stats['frames_processed']}")
+                    processed = self.frames_processed
+                    if processed % 30 == 0:
+                        waldo_logger.logger.info("📹 Processing frame #%d", processed)
                     
                     # Continuous video feed - no timing restrictions!
-                    ret, frame = self.vision.camera.read()
-                    if ret and frame is not None:
-                            self.stats['frames_processed'] += 1
+                    # Decode every frame while an event window is open so the analyzed
+                    # frame is the true last trigger; sparse sampling between events
+                    stride = 1 if self._agg_active else self.decode_stride
+                    raw, seq = read_raw_seq(frame_buf, skip=stride - 1)
+                    if raw is not None:
+                            frame_buf = raw
+                            # Sequence gaps beyond the stride are frames lost to a slow iteration
+                            if seq and last_seq and seq - last_seq > stride:
+                                self.frames_dropped += seq - last_seq - stride
+                            last_seq = seq
+                            processed += 1
+                            self.frames_processed = processed
                             
-                            # Convert to base64 for Waldo Vision
-                            ok_jpg, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                            if not ok_jpg:
-                                continue
-                            jpeg_bytes = buffer.tobytes()
-                            frame_b64 = base64.b64encode(jpeg_bytes).decode('utf-8')
-
-                            # Forward raw JPEG to ingest WS (non-blocking)
-                            try:
-                                ingest_publisher.enqueue(jpeg_bytes)
-                            except Exception as pe:
-                                # Do not disrupt pipeline on ingest errors
-                                pass
+                            if not is_compressed(raw):
+                                frame = filter_input = raw
+                            else:
+                                # MJPEG camera payload: decode just the luma plane at a reduced
+                                # libjpeg scale for the filter; colour is decoded only on trigger
+                                frame = None
+                                filter_input = cv2.imdecode(raw.reshape(-1), self._gray_decode_flag)
+                                if filter_input is None:
+                                    continue
+                            
+                            # Full-size JPEG only when an ingest consumer is connected
+                            if ingest_publisher.active():
+                                # Camera JPEGs pass straight through; otherwise libjpeg-turbo
+                                # (TurboJPEG/simplejpeg) when installed, OpenCV as the fallback
+                                buffer = raw.tobytes() if frame is None else encode_jpeg(frame, self._jpeg_quality)
+                                if buffer is not None:
+                                    try:
+                                        ingest_publisher.enqueue(buffer)
+                                    except Exception as pe:
+                                        # Do not disrupt pipeline on ingest errors
+                                        pass
                             
-                            # Process through Waldo Vision filter with scene state
-                            timestamp_ms = int(current_time * 1000)
-                            should_trigger, confidence, tracked_objects, scene_state = self.filter.process_frame_with_state(frame_b64, timestamp_ms)
+                            # Process a grayscale thumbnail through Waldo Vision with scene state;
+                            # most frames never trigger, so they never pay for a full-size encode
+                            timestamp_ms = now_ns // 1_000_000
+                            should_trigger, confidence, tracked_objects, scene_state = run_filter(
+                                self.filter, filter_input, timestamp_ms, self.filter_size, method='process_frame_with_state'
+                            )
                             
-                            # Log Waldo Vision analysis (reduced frequency to avoid spam)
-                            if should_trigger or self.stats['frames_processed'] % 30 == 0:
+                            # Log Waldo Vision analysis (reduced frequency to avoid spam); skip the
+                            # scene-status query too when neither the log nor a WS client would see it
+                            if (should_trigger or processed % 30 == 0) and (
+                                    log.isEnabledFor(logging.INFO) or (ws_hub and ws_hub.clients)):
                                 try:
                                     _, volatile_cooldown, disturbed_cooldown = self.filter.get_scene_status()
                                     cooldown_remaining = max(volatile_cooldown, disturbed_cooldown)
@@ -174,135 +270,198 @@ class ContinuousWaldoMonitor:
                             
                             # If Waldo Vision says trigger, do full AI analysis
                             if should_trigger:
-                                self.stats['triggers'] += 1
+                                self.triggers += 1
                                 if not self._agg_active:
                                     self._agg_active = True
-                                    self._agg_start_ts = current_time
-                                    self._agg_frames_b64 = []
-                                self._agg_last_trigger_ts = current_time
-                                self._agg_frames_b64.append(frame_b64)
+                                    self._agg_start_ns = now_ns
+                                    self._agg_start_ts = time.time()
+                                    self._agg_frame_count = 0
+                                self._agg_last_trigger_ns = now_ns
+                                if frame is None:
+                                    # A fresh decode of the camera JPEG; nothing else holds it
+                                    self._agg_last_frame = cv2.imdecode(raw.reshape(-1), cv2.IMREAD_COLOR)
+                                else:
+                                    # frame is refilled by the next read; copy it out
+                                    last = self._agg_last_frame
+                                    if last is not None and last.shape == frame.shape and last.dtype == frame.dtype:
+                                        np.copyto(last, frame)
+                                    else:
+                                        self._agg_last_frame = frame.copy()
+                                self._agg_frame_count += 1
                             else:
-                                self.stats['api_saves'] += 1
+                                self.api_saves += 1
 
                             if self._agg_active:
-                                duration = current_time - self._agg_start_ts
-                                triggers_quiet = (current_time - self._agg_last_trigger_ts) > 0.25
-                                timed_out = duration >= self._agg_max_duration
+                                duration_ns = now_ns - self._agg_start_ns
+                                triggers_quiet = now_ns - self._agg_last_trigger_ns > agg_quiet_ns
+                                timed_out = duration_ns >= agg_max_ns
                                 if (not should_trigger and triggers_quiet) or timed_out:
-                                    frames = self._agg_frames_b64[:]
-                                    count = len(frames)
-                                    window_ms = int(duration * 1000)
-                                    waldo_logger.logger.info(f"🧩 EVENT WINDOW | frames={count} | duration={duration:.2f}s | confidence≈{confidence:.1f}%")
+                                    count = self._agg_frame_count
+                                    window_ms = duration_ns // 1_000_000
+                                    log.info("🧩 EVENT WINDOW | frames=%d | duration=%.2fs | confidence≈%.1f%%",
+                                             count, window_ms / 1000, confidence)
                                     try:
                                         if ws_hub:
-                                            ws_hub.broadcast({'type':'waldo_event','frames':count,'duration_ms':window_ms,'ts':int(current_time*1000)})
+                                            ws_hub.broadcast({'type':'waldo_event','frames':count,'duration_ms':window_ms,'ts':time.time_ns() // 1_000_000})
                                     except Exception:
                                         pass
-                                    description = None
-                                    structured = None
-                                    try:
-                                        if frames:
-                                            data = base64.b64decode(frames[-1].split(',')[-1])
-                                            npbuf = np.frombuffer(data, dtype=np.uint8)
-                                            img = cv2.imdecode(npbuf, cv2.IMREAD_COLOR)
-                                            description, structured = self.vision.analyze_image_structured(img)
-                                    except Exception as e:
-                                        waldo_logger.logger.error(f"Aggregation analysis failed: {e}")
-                                    # Persist event to JSONL store
+                                    # Hand the frame buffer itself to the analysis thread (the next
+                                    # window allocates a fresh one), so the provider call never
+                                    # stalls the filter and the frame is not copied again
+                                    job = (self._agg_last_frame, self._agg_start_ts, window_ms, count, confidence)
+                                    self.last_event_frame = self._agg_last_frame
+                                    self._agg_last_frame = None
                                     try:
-                                        event_store.append({
-                                            'type': 'waldo_event',
-                                            'ts_ms': int(self._agg_start_ts * 1000),
-                                            'ts_iso': datetime.utcfromtimestamp(self._agg_start_ts).isoformat() + 'Z',
-                                            'duration_ms': window_ms,
-                                            'frames_count': count,
-                                            'confidence_hint': round(confidence, 1),
-                                            'description': description,
-                                            'observations': (structured or {}).get('observations'),
-                                            'changes': (structured or {}).get('changes'),
-                                            'novel': (structured or {}).get('novel'),
-                                            'salience': (structured or {}).get('salience'),
-                                            'source': 'waldo_monitor'
-                                        })
-                                    except Exception as e:
-                                        waldo_logger.logger.error(f"Event store append failed: {e}")
-                                    if description and self.vision.config['speech']['enabled']:
-                                        try:
-                                            import difflib
-                                            suppress = False
-                                            if self._last_summary_text:
-                                                sim = difflib.SequenceMatcher(None, description.lower(), self._last_summary_text.lower()).ratio()
-                                                if sim >= 0.90 and (current_time - self._last_summary_ts) < 60:
-                                                    suppress = True
-                                                    waldo_logger.logger.info("🛑 Summary suppressed due to repetition (novelty filter)")
-                                            if not suppress:
-                                                waldo_logger.logger.info(f"🗣️ SPEAK (summary): {description[:80]}...")
-                                                self.vision.speak_description(description)
-                                                self._last_summary_text = description
-                                                self._last_summary_ts = current_time
-                                        except Exception as e:
-                                            waldo_logger.logger.error(f"Novelty suppression error: {e}")
+                                        self._analysis_queue.put_nowait(job)
+                                    except queue.Full:
+                                        waldo_logger.logger.warning("⚠️ Analysis backlog full; event window dropped")
                                     self._agg_active = False
-                                    self._agg_frames_b64 = []
+                                    self._agg_frame_count = 0
                     else:
                         # Log failed frame capture occasionally  
-                        if self.stats['frames_processed'] % 30 == 0:
+                        if processed % 30 == 0:
                             waldo_logger.logger.error(f"❌ Frame capture failed")
+                    consecutive_errors = 0
                         
                 except Exception as e:
                     waldo_logger.logger.error(f"❌ Monitor loop error: {e}")
-                    # Brief pause on error to prevent spam
-                    time.sleep(0.1)
+                    # Back off 50 ms, 100 ms, ... up to 2 s so an error storm does not
+                    # spam the log; stop_monitoring() interrupts the wait immediately
+                    self._stop_event.wait(min(2.0, 0.05 * 2 ** consecutive_errors))
+                    consecutive_errors = min(consecutive_errors + 1, 6)
             
             waldo_logger.logger.info("🛑 Continuous monitoring stopped")
         
         self.monitor_thread = threading.Thread(target=continuous_monitor_worker, daemon=True)
         self.monitor_thread.start()
+        self.analysis_thread = threading.Thread(target=self._analysis_worker, daemon=True)
+        self.analysis_thread.start()
         
         waldo_logger.logger.info("🎯 Event-driven monitoring ACTIVE - waiting for scene changes...")
         return True
     
+    def _analysis_worker(self):
+        """Analyze closed event windows off the frame loop"""
+        while not self._stop_event.is_set():
+            try:
+                job = self._analysis_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if self._stop_event.is_set():
+                break
+            self._analyze_event(*job)
+    
+    def _analyze_event(self, frame, start_ts, window_ms, count, confidence):
+        """Describe one event window's last frame, persist it, and speak it if novel"""
+        description = None
+        structured = None
+        try:
+            if count and frame is not None:
+                description, structured = self.vision.analyze_image_structured(frame)
+        except Exception as e:
+            waldo_logger.logger.error(f"Aggregation analysis failed: {e}")
+        # Persist event to JSONL store
+        try:
+            event_store.append({
+                'type': 'waldo_event',
+                'ts_ms': int(start_ts * 1000),
+                'ts_iso': _iso_utc(start_ts),
+                'duration_ms': window_ms,
+                'frames_count': count,
+                'confidence_hint': round(confidence, 1),
+                'description': description,
+                'observations': (structured or {}).get('observations'),
+                'changes': (structured or {}).get('changes'),
+                'novel': (structured or {}).get('novel'),
+                'salience': (structured or {}).get('salience'),
+                'source': 'waldo_monitor'
+            })
+        except Exception as e:
+            waldo_logger.logger.error(f"Event store append failed: {e}")
+        if description and self.vision.config['speech']['enabled']:
+            try:
+                now = time.time()
+                suppress = False
+                words = _word_set(description)
+                if self._last_summary_words:
+                    sim = _jaccard(words, self._last_summary_words)
+                    if sim >= 0.75 and (now - self._last_summary_ts) < 60:
+                        suppress = True
+                        waldo_logger.logger.info("🛑 Summary suppressed due to repetition (novelty filter)")
+                if not suppress:
+                    waldo_logger.logger.info(f"🗣️ SPEAK (summary): {description[:80]}...")
+                    self.vision.speak_description(description)
+                    self._last_summary_text = description
+                    self._last_summary_words = words
+                    self._last_summary_ts = now
+            except Exception as e:
+                waldo_logger.logger.error(f"Novelty suppression error: {e}")
+
     def stop_monitoring(self):
         """Stop continuous monitoring"""
         if not self.monitoring:
             return False
         
         self.monitoring = False
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(timeout=2)
+        self._stop_event.set()
+        # Bounded: a provider call without a timeout must not hang shutdown.
+        # Both loops check the event between steps, and start_monitoring
+        # refuses to run next to a worker that is still finishing
+        for thread in (self.monitor_thread, self.analysis_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=self.STOP_JOIN_TIMEOUT)
+                if thread.is_alive():
+                    waldo_logger.logger.warning("⚠️ Monitoring thread still busy after stop; leaving it to finish")
         
         # Log final stats
-        if self.stats['frames_processed'] > 0:
-            efficiency = (self.stats['api_saves'] / self.stats['frames_processed']) * 100
+        if self.frames_processed > 0:
+            efficiency = (self.api_saves / self.frames_processed) * 100
             waldo_logger.log_pipeline_stats(
-                self.stats['frames_processed'],
-                self.stats['triggers'], 
-                self.stats['api_saves']
+                self.frames_processed,
+                self.triggers, 
+                self.api_saves
             )
             waldo_logger.logger.info(f"📊 SESSION COMPLETE | Efficiency: {efficiency:.1f}% API savings")
         
         waldo_logger.logger.info("🛑 Continuous monitoring STOPPED")
         return True
     
+    def last_event_jpeg(self, quality: int = 85):
+        """JPEG of the newest event window's frame, or None; encoded once per event"""
+        frame = self.last_event_frame
+        if frame is None:
+            return None
+        cached = self._last_event_jpeg
+        if cached and cached[0] is frame and cached[1] == quality:
+            return cached[2]
+        jpeg = encode_jpeg(frame, quality)
+        self._last_event_jpeg = (frame, quality, jpeg)
+        return jpeg
+    
     def _reset_stats(self):
         """Reset statistics"""
-        for key in ['frames_processed', 'triggers', 'api_saves']:
-            self.stats[key] = 0
+        self.frames_processed = 0
+        self.triggers = 0
+        self.api_saves = 0
+        self.frames_dropped = 0
     
     def get_status(self):
         """Get monitoring status and stats"""
-        if self.stats['start_time']:
-            uptime = time.time() - self.stats['start_time']
-            fps = self.stats['frames_processed'] / uptime if uptime > 0 else 0
-            efficiency = (self.stats['api_saves'] / max(self.stats['frames_processed'], 1)) * 100
+        if self.start_time:
+            uptime = time.time() - self.start_time
+            # One snapshot so fps/efficiency agree with the counts reported
+            processed, saves = self.frames_processed, self.api_saves
+            fps = processed / uptime if uptime > 0 else 0
+            efficiency = (saves / max(processed, 1)) * 100
             
             return {
                 'monitoring': self.monitoring,
                 'uptime_seconds': round(uptime, 1),
                 'fps': round(fps, 1),
-                'frames_processed': self.stats['frames_processed'],
-                'ai_triggers': self.stats['triggers'],
-                'api_calls_saved': self.stats['api_saves'],
+                'frames_processed': processed,
+                'ai_triggers': self.triggers,
+                'api_calls_saved': saves,
+                'frames_dropped': self.frames_dropped,
                 'efficiency_percent': round(efficiency, 1),
                 'filter_available': FILTER_AVAILABLE
             }
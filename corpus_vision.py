@@ -22,7 +22,7 @@
 
 # CAVEATS & WARNINGS:
 # - Camera device IDs are hardcoded in config (may change after USB reconnection)
-# - Buffer flushing (5 frames) adds significant latency to single captures
+# - Drivers that ignore CAP_PROP_BUFFERSIZE still need a 5-frame flush per single capture
 # - Gemini API key required in environment (GEMINI_API_KEY) - fails without it
 # - No camera reconnection logic if device becomes unavailable during operation
 # - Speech integration assumes localhost:5001 (hardcoded, not configurable)
@@ -34,9 +34,9 @@
 import cv2
 import yaml
 import logging
-import base64
 import time
 import threading
+import queue
 import os
 from typing import Optional, Dict, Any, Tuple
 from PIL import Image
@@ -45,22 +45,83 @@ import google.generativeai as genai
 import requests
 import io
 from provider_router import VisionRouter
+from jpeg_codec import encode_jpeg, set_backend as set_jpeg_backend
+from frame_utils import FILTER_SIZE, fit_max_side, run_filter
+
+# Under eventlet's monkey patching threads are green, and a blocking driver
+# read would stall every other greenlet; such reads go to its OS thread pool
+try:
+    from eventlet import patcher as _eventlet_patcher, tpool as _eventlet_tpool
+    _GREEN_THREADS = _eventlet_patcher.is_monkey_patched('thread')
+except ImportError:
+    _GREEN_THREADS = False
+
+# libyaml's C loader parses several times faster than the pure-Python one
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
+    with open(config_path, 'r') as file:
+        return yaml.load(file, Loader=_YamlLoader)
+
+
+FIRST_PERSON_PROMPT = ("Describe what you see in this image from a first-person perspective, "
+                       "as if you are an AI companion looking through your camera. "
+                       "Start with 'I can see' or 'I notice' and describe the scene naturally. "
+                       "Keep it concise, around 1-2 sentences.")
+PLAIN_PROMPT = "Describe what you see in this image concisely."
+
 
 class VisionSystem:
-    def __init__(self, config_path: str = "config.yaml"):
-        self.config = self._load_config(config_path)
+    def __init__(self, config_path: str = "config.yaml", config: Optional[Dict[str, Any]] = None):
+        self.config = config if config is not None else self._load_config(config_path)
         self.camera = None
         self.continuous_thread = None
+        self.analysis_thread = None
         self.continuous_running = False
+        # Set on stop so the loops' interval/backoff waits end immediately
+        self._stop_event = threading.Event()
+        self._continuous_frames = None
+        self._latest_description = None
+        self._description_lock = threading.Lock()
+        # Serializes camera access so concurrent requests never interleave reads;
+        # analysis runs outside the lock so slow provider calls can overlap
+        self._camera_lock = threading.Lock()
+        # Frames a single capture skips to get past the driver queue; drops to
+        # 0 once the driver accepts a one-frame buffer
+        self._stale_frames = 5
+        # Background grabber state: the newest frame is published under
+        # _frame_cond so request handlers never wait on the driver queue
+        self._grabber_thread = None
+        self._grabber_running = False
+        self._frame_cond = threading.Condition()
+        self._latest_frame = None
+        self._latest_frame_ts = 0.0
+        self._frame_seq = 0
+        # Monotonic time a consumer last asked for a grabbed frame; with no
+        # recent demand the grabber only grab()s, draining the driver undecoded
+        self._frame_demand_ts = 0.0
+        self._grabber_idle = False
+        # (frame_seq, quality, jpeg) of the last grabbed frame encoded, shared
+        # by every consumer that asks for the same frame
+        self._jpeg_cache = None
+        # Keep-alive connections to the speech service, one Session per thread
+        # since requests.Session is not documented as thread-safe
+        self._speech_local = threading.local()
         # Ensure model attribute always exists to avoid AttributeError
         self.model = None
+        set_jpeg_backend(self.config.get('jpeg', {}).get('backend'))
         self._initialize_camera()
         self._initialize_gemini()
+        if self.config['camera'].get('background_capture', False):
+            self.start_frame_grabber()
         
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         try:
-            with open(config_path, 'r') as file:
-                return yaml.safe_load(file)
+            return load_config(config_path)
         except FileNotFoundError:
             logging.warning(f"Config file {config_path} not found, using defaults")
             return self._default_config()
@@ -69,20 +130,31 @@ class VisionSystem:
         return {
             'camera': {'device_id': 0, 'resolution': {'width': 1920, 'height': 1080}, 'fps': 30},
             'gemini': {'model': 'gemini-1.5-flash', 'max_tokens': 150, 'temperature': 0.7},
-            'vision': {'continuous_mode': False, 'interval': 5, 'first_person': True},
+            'vision': {'continuous_mode': False, 'interval': 5, 'first_person': True, 'max_edge': 768},
             'speech': {'enabled': True, 'speech_api_url': 'http://localhost:5001'}
         }
     
     def _initialize_camera(self):
         try:
             camera_config = self.config['camera']
+            pipeline = camera_config.get('gstreamer_pipeline')
+            if pipeline:
+                # GStreamer negotiates format and size in the pipeline caps; its
+                # appsink hands over the newest decoded buffer and drops the rest
+                self.camera = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+                if self.camera.isOpened():
+                    self._stale_frames = 0
+                    logging.info("Camera initialized from GStreamer pipeline")
+                else:
+                    logging.error("Failed to open GStreamer pipeline")
+                    self.camera = None
+                return
+            
             # Try configured device first
             self.camera = cv2.VideoCapture(camera_config.get('device_id', 0))
             
             # Set camera properties
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, camera_config['resolution']['width'])
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_config['resolution']['height'])
-            self.camera.set(cv2.CAP_PROP_FPS, camera_config['fps'])
+            self._apply_camera_settings(self.camera)
             
             if self.camera.isOpened():
                 logging.info("Camera initialized successfully")
@@ -99,9 +171,7 @@ class VisionSystem:
                     cam = cv2.VideoCapture(dev_id)
                     if cam.isOpened():
                         # Apply same settings
-                        cam.set(cv2.CAP_PROP_FRAME_WIDTH, camera_config['resolution']['width'])
-                        cam.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_config['resolution']['height'])
-                        cam.set(cv2.CAP_PROP_FPS, camera_config['fps'])
+                        self._apply_camera_settings(cam)
                         self.camera = cam
                         self.config['camera']['device_id'] = dev_id
                         logging.info(f"Auto-selected camera device_id={dev_id}")
@@ -112,6 +182,66 @@ class VisionSystem:
             logging.error(f"Camera initialization failed: {e}")
             self.camera = None
     
+    def ensure_single_buffer(self) -> int:
+        """Ask the driver for a one-frame queue and return the buffer size in effect.
+
+        Updates the stale-frame flush to match, so single captures skip it
+        whenever the driver honours the request.
+        """
+        if self.camera is None:
+            return 0
+        if self.config['camera'].get('gstreamer_pipeline'):
+            # The appsink already keeps only the newest buffer
+            return 1
+        with self._camera_lock:
+            buffered = int(self.camera.get(cv2.CAP_PROP_BUFFERSIZE))
+            if buffered != 1:
+                self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                buffered = int(self.camera.get(cv2.CAP_PROP_BUFFERSIZE))
+            self._stale_frames = 0 if buffered == 1 else 5
+        return buffered
+    
+    def frame_size(self) -> Tuple[int, int]:
+        """(width, height) the camera is delivering"""
+        if self.camera is None:
+            return (0, 0)
+        with self._camera_lock:
+            return (int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    
+    def _apply_camera_settings(self, cam):
+        camera_config = self.config['camera']
+        cam.set(cv2.CAP_PROP_FRAME_WIDTH, camera_config['resolution']['width'])
+        cam.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_config['resolution']['height'])
+        cam.set(cv2.CAP_PROP_FPS, camera_config['fps'])
+        # Keep a single driver buffer so a read returns the newest frame rather
+        # than one that sat in the V4L2 queue; backends without support ignore it
+        cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._stale_frames = 0 if cam.get(cv2.CAP_PROP_BUFFERSIZE) == 1 else 5
+        if camera_config.get('capture_format', 'bgr') == 'mjpeg':
+            # Ask the camera for MJPEG and skip OpenCV's decode so reads return
+            # the already-compressed frame; decoding happens only when pixels are needed
+            cam.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            cam.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        elif camera_config.get('fourcc', 'MJPG'):
+            # USB cameras send MJPEG in a fraction of raw YUYV's bandwidth (often the
+            # only way to get 1080p30), and OpenCV decodes it with libjpeg-turbo
+            cam.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*camera_config.get('fourcc', 'MJPG')))
+    
+    def configure_camera(self, width: Optional[int] = None, height: Optional[int] = None,
+                         fps: Optional[int] = None) -> bool:
+        """Change capture settings without racing the grabber thread's reads"""
+        if not self.camera:
+            return False
+        with self._camera_lock:
+            if width:
+                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            if height:
+                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            if fps:
+                self.camera.set(cv2.CAP_PROP_FPS, fps)
+        return True
+    
     def _initialize_gemini(self):
         try:
             api_key = self.config['gemini'].get('api_key') or os.environ.get('GEMINI_API_KEY')
@@ -127,21 +257,154 @@ class VisionSystem:
             logging.error(f"Gemini initialization failed: {e}")
             self.model = None
     
-    def capture_image(self) -> Optional[np.ndarray]:
+    @staticmethod
+    def is_compressed(frame: np.ndarray) -> bool:
+        """True if frame is a raw MJPEG payload from read_raw_seq rather than decoded pixels"""
+        # With CAP_PROP_CONVERT_RGB disabled the backend hands back the raw
+        # MJPEG payload as a single row of bytes instead of an HxWx3 image
+        return frame.ndim == 1 or (frame.ndim == 2 and frame.shape[0] == 1)
+    
+    def _decode(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        if self.is_compressed(frame):
+            return cv2.imdecode(frame.reshape(-1), cv2.IMREAD_COLOR)
+        return frame
+    
+    def _read_camera(self, out: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """camera.read(), into out when given; caller holds _camera_lock"""
+        args = (out,) if out is not None else ()
+        if _GREEN_THREADS:
+            return _eventlet_tpool.execute(self.camera.read, *args)
+        return self.camera.read(*args)
+    
+    def _grab_camera(self) -> bool:
+        """camera.grab(): advance past a frame without decoding it; caller holds _camera_lock"""
+        if _GREEN_THREADS:
+            return _eventlet_tpool.execute(self.camera.grab)
+        return self.camera.grab()
+    
+    def start_frame_grabber(self) -> bool:
+        if self._grabber_running:
+            return True
+        if not self.camera or not self.camera.isOpened():
+            logging.warning("Camera not available; background capture disabled")
+            return False
+        self._grabber_running = True
+        self._grabber_thread = threading.Thread(target=self._frame_grabber_loop, daemon=True)
+        self._grabber_thread.start()
+        logging.info("Background frame grabber started")
+        return True
+    
+    def stop_frame_grabber(self):
+        if not self._grabber_running:
+            return
+        self._grabber_running = False
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        if self._grabber_thread:
+            self._grabber_thread.join(timeout=2)
+        logging.info("Background frame grabber stopped")
+    
+    # Preallocated frame buffers the grabber cycles through
+    FRAME_RING_SLOTS = 3
+    # Seconds without a consumer before the grabber stops decoding
+    GRABBER_IDLE_AFTER = 2.0
+    
+    def _frame_grabber_loop(self):
+        # Drain the camera continuously so the driver queue never holds stale
+        # frames. Frames are decoded in place into a small ring of reused
+        # buffers instead of allocating a new full-size array per frame.
+        ring = [None] * self.FRAME_RING_SLOTS
+        slot = 0
+        while self._grabber_running:
+            # Demand is checked and idle set under the condition consumers stamp
+            # demand under: a consumer either keeps the grabber decoding or sees
+            # it idle and waits for a fresh frame, never takes the stale one
+            with self._frame_cond:
+                idle = time.monotonic() - self._frame_demand_ts > self.GRABBER_IDLE_AFTER
+                if idle:
+                    self._grabber_idle = True
+            if idle:
+                # Nobody is reading frames: keep the driver queue drained without
+                # paying for a decode; grab() blocks for the next frame period
+                with self._camera_lock:
+                    ret = self._grab_camera()
+                if not ret:
+                    time.sleep(0.05)
+                continue
+            with self._camera_lock:
+                ret, frame = self._read_camera(ring[slot])
+            if not ret or frame is None:
+                time.sleep(0.05)
+                continue
+            # read() hands back the slot itself, or a new array if the size changed
+            ring[slot] = frame
+            with self._frame_cond:
+                self._latest_frame = frame
+                self._latest_frame_ts = time.time()
+                self._frame_seq += 1
+                self._grabber_idle = False
+                self._frame_cond.notify_all()
+            slot = (slot + 1) % self.FRAME_RING_SLOTS
+    
+    def _latest_raw(self, wait_for_new: bool = False, timeout: float = 1.0,
+                    out: Optional[np.ndarray] = None, advance: int = 1) -> Tuple[Optional[np.ndarray], int]:
+        with self._frame_cond:
+            self._frame_demand_ts = time.monotonic()
+            # An idle grabber's latest frame is stale; wait for the first decoded one
+            seq = self._frame_seq if wait_for_new or self._grabber_idle else 0
+            self._frame_cond.wait_for(
+                lambda: (self._frame_seq - seq >= advance and self._latest_frame is not None) or not self._grabber_running,
+                timeout=timeout
+            )
+            if self._frame_seq == seq:
+                return None, seq
+            # Copy while holding the condition: the grabber cannot publish, and
+            # so cannot cycle back around to this slot, until we are done
+            latest = self._latest_frame
+            if out is not None and out.shape == latest.shape and out.dtype == latest.dtype:
+                np.copyto(out, latest)
+                return out, self._frame_seq
+            return latest.copy(), self._frame_seq
+    
+    def _grabbed_jpeg(self, quality: int, wait_for_new: bool = False) -> Optional[bytes]:
+        frame, seq = self._latest_raw(wait_for_new=wait_for_new)
+        if frame is None:
+            return None
+        cached = self._jpeg_cache
+        if cached is not None and cached[0] == seq and cached[1] == quality:
+            return cached[2]
+        jpeg = frame.tobytes() if self.is_compressed(frame) else encode_jpeg(frame, quality)
+        if jpeg is not None:
+            self._jpeg_cache = (seq, quality, jpeg)
+        return jpeg
+    
+    @property
+    def last_frame_time(self) -> Optional[float]:
+        """Wall-clock time the grabber published its latest frame, if it is running"""
+        return self._latest_frame_ts if self._grabber_running else None
+    
+    def _capture_raw(self) -> Optional[np.ndarray]:
         if not self.camera or not self.camera.isOpened():
             logging.error("Camera not available")
             return None
         
-        # Flush camera buffer by reading multiple frames to get fresh image
-        # This ensures we get the current live view, not a buffered frame
-        for _ in range(5):
-            ret, frame = self.camera.read()
-            if not ret:
-                logging.error("Failed to capture frame during buffer flush")
-                return None
+        if self._grabber_running:
+            frame, _ = self._latest_raw()
+            if frame is None:
+                logging.error("No frame available from background grabber")
+            return frame
         
-        # Final read for the actual image we want
-        ret, frame = self.camera.read()
+        with self._camera_lock:
+            # Skip frames the driver queued before this request so we get the
+            # current live view; grab() skips them without decoding. A one-frame
+            # driver buffer needs no flush at all
+            for _ in range(self._stale_frames):
+                if not self._grab_camera():
+                    logging.error("Failed to capture frame during buffer flush")
+                    return None
+            
+            # Final read for the actual image we want
+            ret, frame = self._read_camera()
         if ret:
             logging.info("Fresh image captured successfully")
             return frame
@@ -149,22 +412,90 @@ class VisionSystem:
             logging.error("Failed to capture final image")
             return None
     
-    def analyze_image(self, image: np.ndarray) -> Optional[str]:
-        # Convert OpenCV image to PIL
+    def capture_image(self) -> Optional[np.ndarray]:
+        frame = self._capture_raw()
+        if frame is None:
+            return None
+        return self._decode(frame)
+    
+    def capture_jpeg(self, quality: int = 85) -> Optional[bytes]:
+        """Capture a frame as JPEG bytes, passing MJPEG camera output through untouched"""
+        if self._grabber_running:
+            jpeg = self._grabbed_jpeg(quality)
+            if jpeg is None:
+                logging.error("No frame available from background grabber")
+            return jpeg
+        frame = self._capture_raw()
+        if frame is None:
+            return None
+        if self.is_compressed(frame):
+            return frame.tobytes()
+        return encode_jpeg(frame, quality)
+    
+    def _read_raw(self, out: Optional[np.ndarray] = None, skip: int = 0) -> Tuple[Optional[np.ndarray], int]:
+        if not self.camera:
+            return None, 0
+        if self._grabber_running:
+            # Block until the grabber publishes the next frame, like camera.read()
+            return self._latest_raw(wait_for_new=True, out=out, advance=skip + 1,
+                                    timeout=1.0 + skip / 10)
+        with self._camera_lock:
+            # Skipped frames are only grabbed, never decoded
+            for _ in range(skip):
+                self._grab_camera()
+            ret, frame = self._read_camera(out)
+        if not ret or frame is None:
+            return None, 0
+        return frame, 0
+    
+    def read_raw_seq(self, out: Optional[np.ndarray] = None, skip: int = 0) -> Tuple[Optional[np.ndarray], int]:
+        """Single unflushed read for continuous consumers that keep up with the camera,
+        with the grabber's sequence number for the frame (0 without the grabber).
+
+        MJPEG cameras return the compressed payload undecoded (see
+        is_compressed). Passing the previously returned frame as out refills
+        it in place when the size matches, so a consumer loop reuses one
+        buffer. skip passes over that many frames first, grabbing them
+        without a decode.
+        """
+        return self._read_raw(out, skip)
+    
+    def read_jpeg(self, quality: int = 85) -> Optional[bytes]:
+        """Unflushed read as JPEG bytes, passing MJPEG camera output through untouched"""
+        if self._grabber_running:
+            return self._grabbed_jpeg(quality, wait_for_new=True)
+        frame, _ = self._read_raw()
+        if frame is None:
+            return None
+        if self.is_compressed(frame):
+            return frame.tobytes()
+        return encode_jpeg(frame, quality)
+    
+    def analyze_image(self, image: np.ndarray, use_cache: bool = False) -> Optional[str]:
+        """Describe a BGR frame; use_cache lets a near-identical recent frame reuse its description"""
+        # Convert OpenCV image to PIL in one pass: Pillow's raw decoder swaps
+        # BGR->RGB while copying, so no intermediate RGB ndarray is allocated
         try:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(rgb_image)
+            # Providers downscale internally anyway; shrinking first cuts the
+            # conversion, the JPEG encode and the upload (0 disables)
+            image = fit_max_side(image, self.config['vision'].get('max_edge', 768))
+            if image.dtype != np.uint8:
+                # Providers take 8-bit JPEG/PNG; never ship wider pixels. A fixed
+                # scale (not a per-frame stretch) keeps brightness, and so the
+                # perceptual hash, stable between frames
+                if np.issubdtype(image.dtype, np.integer):
+                    alpha = 255.0 / np.iinfo(image.dtype).max
+                else:
+                    alpha = 255.0  # float frames are in [0, 1]
+                image = cv2.convertScaleAbs(image, alpha=alpha)
+            height, width = image.shape[:2]
+            pil_image = Image.frombuffer('RGB', (width, height), np.ascontiguousarray(image),
+                                         'raw', 'BGR', 0, 1)
         except Exception as e:
             logging.error(f"Image conversion failed: {e}")
             return None
 
-        if self.config['vision']['first_person']:
-            prompt = ("Describe what you see in this image from a first-person perspective, "
-                      "as if you are an AI companion looking through your camera. "
-                      "Start with 'I can see' or 'I notice' and describe the scene naturally. "
-                      "Keep it concise, around 1-2 sentences.")
-        else:
-            prompt = "Describe what you see in this image concisely."
+        prompt = FIRST_PERSON_PROMPT if self.config['vision']['first_person'] else PLAIN_PROMPT
 
         # Use router with priority order (env VISION_PROVIDER_ORDER)
         try:
@@ -172,7 +503,7 @@ class VisionSystem:
             if router is None:
                 router = VisionRouter()
                 self.vision_router = router
-            desc = router.analyze(pil_image, prompt)
+            desc = router.analyze(pil_image, prompt, image, use_cache=use_cache)
             if desc:
                 return desc
         except Exception as e:
@@ -187,13 +518,21 @@ class VisionSystem:
             logging.error(f"Gemini fallback failed: {e}")
         return None
 
+    @property
+    def speech_session(self) -> requests.Session:
+        """This thread's keep-alive Session for the speech service"""
+        session = getattr(self._speech_local, 'session', None)
+        if session is None:
+            session = self._speech_local.session = requests.Session()
+        return session
+    
     def speak_description(self, description: str) -> bool:
         if not self.config['speech']['enabled']:
             return False
         
         try:
             speech_url = f"{self.config['speech']['speech_api_url']}/speak"
-            response = requests.post(
+            response = self.speech_session.post(
                 speech_url,
                 json={'text': description},
                 timeout=10
@@ -214,7 +553,7 @@ class VisionSystem:
         
         return description
     
-    def get_filtered_view_description(self, filter_obj=None) -> Optional[str]:
+    def get_filtered_view_description(self, filter_obj=None, filter_size=FILTER_SIZE) -> Optional[str]:
         """Get description using Waldo Vision filter to determine if analysis is needed"""
         from waldo_vision_logger import waldo_logger
         
@@ -227,13 +566,9 @@ class VisionSystem:
         # Use Waldo Vision filter if available
         if filter_obj:
             try:
-                # Convert frame to base64 for filter
-                _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                frame_b64 = base64.b64encode(buffer).decode('utf-8')
-                
-                # Process through Waldo Vision
+                # Process a downscaled thumbnail through Waldo Vision; analysis keeps the full frame
                 timestamp_ms = int(time.time() * 1000)
-                should_trigger, confidence, tracked_objects = filter_obj.process_frame(frame_b64, timestamp_ms)
+                should_trigger, confidence, tracked_objects = run_filter(filter_obj, image, timestamp_ms, filter_size)
                 
                 # Log Waldo Vision decision
                 waldo_logger.log_frame_analysis(
@@ -271,15 +606,50 @@ class VisionSystem:
         return description
     
     def _continuous_vision_loop(self):
+        # Capture stage: grabs the next frame while the previous one is still
+        # being analyzed, keeping at most two frames in flight
+        while self.continuous_running:
+            try:
+                image = self.capture_image()
+                if image is not None:
+                    try:
+                        self._continuous_frames.put_nowait(image)
+                    except queue.Full:
+                        # Analysis is behind; replace the oldest frame with the fresh one
+                        try:
+                            self._continuous_frames.get_nowait()
+                        except queue.Empty:
+                            pass
+                        self._continuous_frames.put_nowait(image)
+                if self._stop_event.wait(self.config['vision']['interval']):
+                    break
+            except Exception as e:
+                logging.error(f"Error in continuous vision loop: {e}")
+                self._stop_event.wait(1)
+    
+    def _continuous_analysis_loop(self):
+        # Analysis stage: provider call and speech, overlapped with the next capture
         while self.continuous_running:
             try:
-                description = self.get_current_view_description()
+                image = self._continuous_frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                # A static scene would only repeat itself: reuse recent descriptions
+                description = self.analyze_image(image, use_cache=True)
                 if description:
                     logging.info(f"Vision: {description}")
-                time.sleep(self.config['vision']['interval'])
+                    with self._description_lock:
+                        self._latest_description = (description, time.time())
+                    if self.config['speech']['enabled']:
+                        self.speak_description(description)
             except Exception as e:
-                logging.error(f"Error in continuous vision loop: {e}")
-                time.sleep(1)
+                logging.error(f"Error in continuous vision analysis: {e}")
+    
+    def get_latest_description(self) -> Optional[Tuple[str, float]]:
+        """Most recent (description, timestamp) produced by the continuous loop"""
+        with self._description_lock:
+            return self._latest_description
     
     def start_continuous_vision(self, interval: Optional[int] = None) -> bool:
         if self.continuous_running:
@@ -290,9 +660,14 @@ class VisionSystem:
             self.config['vision']['interval'] = interval
         
         self.continuous_running = True
+        self._stop_event.clear()
+        self._continuous_frames = queue.Queue(maxsize=2)
         self.continuous_thread = threading.Thread(target=self._continuous_vision_loop)
         self.continuous_thread.daemon = True
         self.continuous_thread.start()
+        self.analysis_thread = threading.Thread(target=self._continuous_analysis_loop)
+        self.analysis_thread.daemon = True
+        self.analysis_thread.start()
         
         logging.info(f"Started continuous vision (interval: {self.config['vision']['interval']}s)")
         return True
@@ -303,22 +678,38 @@ class VisionSystem:
             return False
         
         self.continuous_running = False
+        self._stop_event.set()
         if self.continuous_thread:
             self.continuous_thread.join(timeout=5)
+        if self.analysis_thread:
+            self.analysis_thread.join(timeout=5)
         
         logging.info("Stopped continuous vision")
         return True
     
     def get_status(self) -> Dict[str, Any]:
-        return {
+        status = {
             'camera_available': self.camera is not None and self.camera.isOpened(),
             'gemini_available': self.model is not None,
             'continuous_running': self.continuous_running,
             'speech_enabled': self.config['speech']['enabled']
         }
+        router = getattr(self, 'vision_router', None)
+        if router is not None:
+            status['description_cache'] = router.cache.stats()
+        return status
+    
+    def clear_description_cache(self):
+        """Forget cached descriptions, e.g. after prompt settings change"""
+        router = getattr(self, 'vision_router', None)
+        if router is not None:
+            router.cache.clear()
     
     def cleanup(self):
-        self.stop_continuous_vision()
+        if self.continuous_running:
+            self.stop_continuous_vision()
+        self.stop_frame_grabber()
         if self.camera:
             self.camera.release()
+            self.camera = None
         cv2.destroyAllWindows()
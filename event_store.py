@@ -1,87 +1,341 @@
 import os
+import glob
 import json
+import time
+import logging
+import queue
+import atexit
+import sqlite3
 import threading
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, timezone, date
+from typing import List, Dict, Any, Optional, Union
+
+from fastjson import dumps
+
+
+def _parse_iso(value: Any) -> Optional[datetime]:
+    """ISO-8601 string to an aware UTC datetime (naive values are taken as UTC), or None"""
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except Exception:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _context_entry(ev: Dict[str, Any]) -> Dict[str, Any]:
+    # Keep only essentials for prompt context
+    return {
+        'ts_iso': ev.get('ts_iso'),
+        'duration_ms': ev.get('duration_ms'),
+        'frames_count': ev.get('frames_count'),
+        'description': ev.get('description'),
+        'confidence_hint': ev.get('confidence_hint'),
+    }
 
 
 class EventStore:
+    """Append-only JSONL event log, sharded into one file per UTC day.
+
+    VISION_EVENT_LOG names the base path; events go to <stem>_YYYYMMDD<ext>
+    next to it, so time-window queries only open the days they cover. A log
+    written before sharding, at the base path itself, is still read.
+
+    append() only queues the serialized line; a background thread writes
+    queued lines in batches, one open and one write per file per batch.
+    Queries flush first, so they always see every appended event.
+    """
+
+    FLUSH_MAX_LINES = 64
+    FLUSH_MAX_DELAY = 0.2
+
     def __init__(self, path: Optional[str] = None):
         self.path = path or os.environ.get('VISION_EVENT_LOG', '/home/nerostar/Projects/corpus/vision_events.jsonl')
+        self._stem, self._ext = os.path.splitext(self.path)
         self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._flusher: Optional[threading.Thread] = None
         # Ensure directory exists
         try:
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
         except Exception:
             pass
+        # No-op unless a flusher is running; registered once per store
+        atexit.register(self.close)
+
+    def _path_for(self, day: date) -> str:
+        return f"{self._stem}_{day:%Y%m%d}{self._ext}"
+
+    def _all_files(self) -> List[str]:
+        """Every log file, oldest first: the pre-sharding log, then the day files"""
+        files = sorted(glob.glob(glob.escape(self._stem) + '_[0-9]*' + glob.escape(self._ext)))
+        if os.path.exists(self.path):
+            files.insert(0, self.path)
+        return files
+
+    def _files_between(self, first: date, last: date) -> List[str]:
+        files = [self.path] if os.path.exists(self.path) else []
+        day = first
+        while day <= last:
+            path = self._path_for(day)
+            if os.path.exists(path):
+                files.append(path)
+            day += timedelta(days=1)
+        return files
+
+    def append(self, event: Union[Dict[str, Any], bytes]):
+        """Append one event; callers may pass an already-serialized JSON line"""
+        if isinstance(event, (bytes, bytearray)):
+            line, dt = event, None
+        else:
+            line, dt = dumps(event), _parse_iso(event.get('ts_iso')) if event.get('ts_iso') else None
+        # File by the event's own timestamp so range queries find it on its day
+        path = self._path_for((dt or datetime.now(timezone.utc)).date())
+        self._ensure_flusher()
+        self._queue.put_nowait((path, line))
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name='event-store-flush', daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        """Collect up to FLUSH_MAX_LINES lines or FLUSH_MAX_DELAY seconds, then write them.
+
+        Queue items are (path, line) pairs, a threading.Event to set once
+        everything queued before it is on disk, or None to write and exit.
+        """
+        while True:
+            batch: List[tuple] = []
+            marker: Optional[threading.Event] = None
+            stop = False
+            item = self._queue.get()
+            deadline = time.monotonic() + self.FLUSH_MAX_DELAY
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    marker = item
+                    break
+                batch.append(item)
+                if len(batch) >= self.FLUSH_MAX_LINES:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            if marker is not None:
+                marker.set()
+            if stop:
+                return
 
-    def append(self, event: Dict[str, Any]):
-        line = json.dumps(event, ensure_ascii=False)
+    def _write(self, batch: List[tuple]):
+        by_path: Dict[str, List[bytes]] = {}
+        for path, line in batch:
+            by_path.setdefault(path, []).append(line)
         with self._lock:
-            with open(self.path, 'a', encoding='utf-8') as f:
-                f.write(line + '\n')
+            for path, lines in by_path.items():
+                try:
+                    with open(path, 'ab') as f:
+                        f.write(b'\n'.join(lines) + b'\n')
+                except Exception as e:
+                    logging.error(f"Event store write to {path} failed, {len(lines)} events lost: {e}")
+
+    def flush(self, timeout: float = 2.0):
+        """Block until every event appended so far has been written"""
+        if self._flusher is None or not self._flusher.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 2.0):
+        """Write pending events and stop the flusher thread"""
+        if self._flusher is None or not self._flusher.is_alive():
+            return
+        self._queue.put(None)
+        self._flusher.join(timeout)
 
-    def _read_all(self) -> List[Dict[str, Any]]:
+    def _read_all(self, files: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         events: List[Dict[str, Any]] = []
-        if not os.path.exists(self.path):
-            return events
         with self._lock:
-            with open(self.path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        events.append(json.loads(line))
-                    except Exception:
-                        continue
+            for path in self._all_files() if files is None else files:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            events.append(json.loads(line))
+                        except Exception:
+                            continue
         return events
 
+    def _tail_lines(self, path: str, n: int, block: int = 4096) -> List[bytes]:
+        """Last n non-empty lines of path, read backwards in blocks from the end of the file"""
+        with self._lock:
+            with open(path, 'rb') as f:
+                pos = f.seek(0, os.SEEK_END)
+                data = b''
+                # One extra newline so the first kept line is known to be complete
+                while pos > 0 and data.count(b'\n') <= n:
+                    step = min(block, pos)
+                    pos -= step
+                    f.seek(pos)
+                    data = f.read(step) + data
+        lines = [line for line in data.split(b'\n') if line.strip()]
+        if pos > 0:
+            lines = lines[1:]  # partial line at the block boundary
+        return lines[-n:]
+
     def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
-        events = self._read_all()
-        return events[-limit:] if limit and len(events) > limit else events
+        self.flush()
+        if not limit:
+            return self._read_all()
+        # Newest day first, stepping back only while more lines are needed
+        lines: List[bytes] = []
+        for path in reversed(self._all_files()):
+            lines = self._tail_lines(path, limit - len(lines)) + lines
+            if len(lines) >= limit:
+                break
+        events: List[Dict[str, Any]] = []
+        for line in lines:
+            try:
+                events.append(json.loads(line))
+            except Exception:
+                continue
+        return events
 
     def range(self, from_iso: str, to_iso: str) -> List[Dict[str, Any]]:
-        events = self._read_all()
-        try:
-            start = datetime.fromisoformat(from_iso.replace('Z', '+00:00'))
-            end = datetime.fromisoformat(to_iso.replace('Z', '+00:00'))
-        except Exception:
+        start = _parse_iso(from_iso)
+        end = _parse_iso(to_iso)
+        if start is None or end is None:
             return []
+        self.flush()
         out: List[Dict[str, Any]] = []
-        for ev in events:
-            ts = ev.get('ts_iso') or ev.get('ts')
-            try:
-                dt = datetime.fromisoformat(str(ts).replace('Z', '+00:00'))
-            except Exception:
-                continue
-            if start <= dt <= end:
+        for ev in self._read_all(self._files_between(start.astimezone(timezone.utc).date(),
+                                                     end.astimezone(timezone.utc).date())):
+            dt = _parse_iso(ev.get('ts_iso') or ev.get('ts'))
+            if dt is not None and start <= dt <= end:
                 out.append(ev)
         return out
 
     def context(self, window_minutes: int = 15, limit: int = 20) -> Dict[str, Any]:
-        events = self._read_all()
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         cutoff = now - timedelta(minutes=window_minutes)
+        self.flush()
+        events = self._read_all(self._files_between(cutoff.date(), now.date()))
         selected: List[Dict[str, Any]] = []
         for ev in reversed(events):
-            ts = ev.get('ts_iso') or ev.get('ts')
+            dt = _parse_iso(ev.get('ts_iso') or ev.get('ts'))
+            if dt is None:
+                continue
+            if dt < cutoff:
+                # Appended in time order: everything further back is older still
+                break
+            selected.append(_context_entry(ev))
+            if len(selected) >= limit:
+                break
+        selected.reverse()
+        return {
+            'window_minutes': window_minutes,
+            'limit': limit,
+            'count': len(selected),
+            'events': selected
+        }
+
+
+class SqliteEventStore:
+    """EventStore with the same API on SQLite, for logs too large to rescan.
+
+    Used when VISION_EVENT_LOG ends in .db or .sqlite. Events keep their JSON
+    text; an indexed UTC sort key beside it turns range() and context() into
+    an index seek and recent() into a reverse rowid walk, so queries cost the
+    same however long the log grows. WAL lets the API threads read while the
+    monitor writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        except Exception:
+            pass
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # WAL stays consistent on power loss at NORMAL; only the last commits can be lost
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS events(id INTEGER PRIMARY KEY, ts TEXT, json TEXT)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts)')
+        atexit.register(self.close)
+
+    @staticmethod
+    def _sort_key(dt: Optional[datetime]) -> Optional[str]:
+        """Fixed-width UTC timestamp, so string order is time order whatever offset ts_iso used"""
+        return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f') if dt else None
+
+    def append(self, event: Union[Dict[str, Any], bytes]):
+        """Append one event; callers may pass an already-serialized JSON line"""
+        if isinstance(event, (bytes, bytearray)):
+            line = bytes(event)
+            try:
+                event = json.loads(line)
+            except Exception:
+                event = {}
+        else:
+            line = dumps(event)
+        ts = (event.get('ts_iso') or event.get('ts')) if isinstance(event, dict) else None
+        key = self._sort_key((_parse_iso(ts) if ts else None) or datetime.now(timezone.utc))
+        with self._lock:
+            self.conn.execute('INSERT INTO events(ts, json) VALUES (?, ?)', (key, line.decode('utf-8')))
+
+    def flush(self, timeout: float = 2.0):
+        """Nothing to do: every append commits on its own"""
+
+    def close(self, timeout: float = 2.0):
+        """Close the connection, checkpointing the WAL back into the database"""
+        with self._lock:
             try:
-                dt = datetime.fromisoformat(str(ts).replace('Z', '+00:00'))
+                self.conn.close()
+            except Exception:
+                pass
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        events: List[Dict[str, Any]] = []
+        for (text,) in rows:
+            try:
+                events.append(json.loads(text))
             except Exception:
                 continue
-            if dt >= cutoff:
-                # Keep only essentials for prompt context
-                selected.append({
-                    'ts_iso': ev.get('ts_iso'),
-                    'duration_ms': ev.get('duration_ms'),
-                    'frames_count': ev.get('frames_count'),
-                    'description': ev.get('description'),
-                    'confidence_hint': ev.get('confidence_hint'),
-                })
-                if len(selected) >= limit:
-                    break
-        selected.reverse()
+        return events
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        if not limit:
+            return self._query('SELECT json FROM events ORDER BY id')
+        events = self._query('SELECT json FROM events ORDER BY id DESC LIMIT ?', (limit,))
+        events.reverse()
+        return events
+
+    def range(self, from_iso: str, to_iso: str) -> List[Dict[str, Any]]:
+        start = _parse_iso(from_iso)
+        end = _parse_iso(to_iso)
+        if start is None or end is None:
+            return []
+        return self._query('SELECT json FROM events WHERE ts BETWEEN ? AND ? ORDER BY ts',
+                           (self._sort_key(start), self._sort_key(end)))
+
+    def context(self, window_minutes: int = 15, limit: int = 20) -> Dict[str, Any]:
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+        events = self._query('SELECT json FROM events WHERE ts >= ? ORDER BY ts DESC LIMIT ?',
+                             (self._sort_key(cutoff), limit))
+        selected = [_context_entry(ev) for ev in reversed(events)]
         return {
             'window_minutes': window_minutes,
             'limit': limit,
@@ -90,6 +344,13 @@ class EventStore:
         }
 
 
-# Shared store instance for easy reuse
-store = EventStore()
+def open_store(path: Optional[str] = None):
+    """EventStore for a path, SQLite-backed when it names a .db or .sqlite file"""
+    path = path or os.environ.get('VISION_EVENT_LOG', '/home/nerostar/Projects/corpus/vision_events.jsonl')
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SqliteEventStore(path)
+    return EventStore(path)
 
+
+# Shared store instance for easy reuse
+store = open_store()
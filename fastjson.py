@@ -0,0 +1,23 @@
+import json
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from flask import Response
+
+# orjson serializes straight to bytes in C; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload: Any, status: int = 200) -> "Response":
+    # Imported here so dumps() stays usable without Flask (e.g. the event store)
+    from flask import Response
+    return Response(dumps(payload), status=status, mimetype='application/json')
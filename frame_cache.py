@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class FrameCache:
+    """Thread-safe LRU mapping frame hashes to analysis results.
+
+    Keys are an int perceptual hash, optionally prefixed by other fields in a
+    tuple (e.g. (prompt, hash)). With max_distance > 0 a lookup also matches
+    a cached hash with the same prefix that differs in at most that many
+    bits, so near-identical frames share a result. Entries older than ttl
+    seconds count as missing.
+    """
+
+    def __init__(self, maxsize: int = 64, ttl: Optional[float] = None, max_distance: int = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _split(key: Hashable) -> Tuple[Hashable, Any]:
+        if isinstance(key, tuple):
+            return key[:-1], key[-1]
+        return (), key
+
+    def _nearest(self, key: Hashable, now: float) -> Optional[Hashable]:
+        prefix, frame_hash = self._split(key)
+        if not isinstance(frame_hash, int):
+            return None
+        best, best_distance = None, self.max_distance + 1
+        for cached in self._entries:
+            cached_prefix, cached_hash = self._split(cached)
+            if cached_prefix != prefix or not isinstance(cached_hash, int):
+                continue
+            distance = bin(frame_hash ^ cached_hash).count('1')
+            if distance < best_distance and not self._expired(cached, now):
+                best, best_distance = cached, distance
+        return best
+
+    def _expired(self, key: Hashable, now: float) -> bool:
+        return self.ttl is not None and now - self._entries[key][1] > self.ttl
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries and self._expired(key, now):
+                del self._entries[key]
+            if key not in self._entries and self.max_distance > 0:
+                key = self._nearest(key, now)
+            if key is None or key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
@@ -0,0 +1,104 @@
+import binascii
+import hashlib
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from jpeg_codec import encode_jpeg
+
+# Change detection is resolution-insensitive; the filter compares thumbnails
+FILTER_SIZE = (320, 180)
+
+
+def dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    """64-bit difference hash of a BGR or grayscale frame.
+
+    The frame is shrunk before any colour work so the cost is independent of
+    the capture resolution.
+    """
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def fit_max_side(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale so the longer side is at most max_side; smaller frames are returned as-is"""
+    longest = max(image.shape[:2])
+    if max_side <= 0 or longest <= max_side:
+        return image
+    scale = max_side / longest
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def jpeg_etag(jpeg: bytes) -> str:
+    """ETag for an encoded frame: a 64-bit BLAKE2b digest of the JPEG bytes.
+
+    Hashing the bytes costs far less than decoding them, so every response
+    can carry a tag. With the background grabber, repeat requests for the
+    same frame reuse its cached JPEG and so match.
+    """
+    return hashlib.blake2b(jpeg, digest_size=8).hexdigest()
+
+
+def encode_ppm(image: np.ndarray) -> bytes:
+    """Binary PPM (P6) of a BGR frame: a short header and the RGB pixels, no compression"""
+    height, width = image.shape[:2]
+    header = b'P6\n%d %d\n255\n' % (width, height)
+    return header + cv2.cvtColor(image, cv2.COLOR_BGR2RGB).tobytes()
+
+
+def filter_thumbnail(image: np.ndarray, size: Tuple[int, int] = FILTER_SIZE) -> np.ndarray:
+    """Grayscale thumbnail for the change-detection filter.
+
+    Shrinking first keeps the filter's per-pixel compare small no matter the
+    capture resolution. A single luma plane gives the filter one contiguous
+    u8 buffer to difference and drops the chroma the scene comparison does
+    not need.
+    """
+    small = cv2.resize(image, tuple(size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+_REDUCED_GRAYSCALE = ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+                      (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                      (2, cv2.IMREAD_REDUCED_GRAYSCALE_2))
+
+
+def reduced_gray_flag(frame_size: Tuple[int, int], size: Tuple[int, int] = FILTER_SIZE) -> int:
+    """cv2.imdecode flag for a grayscale decode of a frame_size JPEG at the smallest
+    libjpeg scale (1/8, 1/4, 1/2) that still covers size.
+
+    Scaled decoding skips most of the IDCT work and a grayscale decode skips
+    the chroma planes, so the filter thumbnail costs a fraction of a full decode.
+    """
+    for factor, flag in _REDUCED_GRAYSCALE:
+        if frame_size[0] // factor >= size[0] and frame_size[1] // factor >= size[1]:
+            return flag
+    return cv2.IMREAD_GRAYSCALE
+
+
+def filter_frame_b64(image: np.ndarray, size: Tuple[int, int] = FILTER_SIZE, quality: int = 80) -> str:
+    """Base64 JPEG of filter_thumbnail(), the filter's string input format"""
+    jpeg = encode_jpeg(filter_thumbnail(image, size), quality, fast=True)
+    return binascii.b2a_base64(jpeg, newline=False).decode('ascii')
+
+
+def run_filter(filter_obj, image: np.ndarray, timestamp_ms: int, size: Tuple[int, int] = FILTER_SIZE,
+               method: str = 'process_frame'):
+    """Run a filter entry point (process_frame by default) on a frame's thumbnail.
+
+    Filter builds that expose the matching <method>_buffer read the
+    thumbnail's pixels in place through the buffer protocol; older builds
+    get the base64 JPEG.
+    """
+    buffer_entry = getattr(filter_obj, method + '_buffer', None)
+    if buffer_entry is not None:
+        small = np.ascontiguousarray(filter_thumbnail(image, size))
+        height, width = small.shape
+        return buffer_entry(memoryview(small), width, height, small.strides[0], timestamp_ms)
+    return getattr(filter_obj, method)(filter_frame_b64(image, size), timestamp_ms)
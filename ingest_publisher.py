@@ -2,8 +2,8 @@ import os
 import json
 import time
 import threading
-import queue
 import logging
+from collections import deque
 
 try:
     import websockets
@@ -15,7 +15,10 @@ class IngestPublisher:
     def __init__(self):
         self.url = os.environ.get('INGEST_WS_URL')
         self.enabled = os.environ.get('INGEST_ENABLED', 'false').lower() in ('1', 'true', 'yes')
-        self.q: "queue.Queue[bytes]" = queue.Queue(maxsize=100)
+        # Bounded ring: deque.append/popleft are atomic under the GIL, so the
+        # monitor never takes a lock to hand off a frame; oldest frames drop first
+        self._ring: "deque[bytes | memoryview]" = deque(maxlen=3)
+        self._event = threading.Event()
         self.thread: threading.Thread | None = None
         self.stop_flag = False
         self.width = None
@@ -48,15 +51,17 @@ class IngestPublisher:
                                 pass
                             # Streaming loop
                             while not self.stop_flag:
-                                try:
-                                    frame = self.q.get(timeout=0.5)
-                                except queue.Empty:
+                                if not self._event.wait(timeout=0.5):
                                     await asyncio.sleep(0.05)
                                     continue
+                                # Clear before draining so a frame appended mid-drain re-arms it
+                                self._event.clear()
                                 try:
-                                    await ws.send(frame)
-                                    self.sent_count += 1
-                                    logging.info(f"Ingest: sent frame #{self.sent_count} ({len(frame)} bytes)")
+                                    while self._ring:
+                                        frame = self._ring.popleft()
+                                        await ws.send(frame)
+                                        self.sent_count += 1
+                                        logging.info(f"Ingest: sent frame #{self.sent_count} ({len(frame)} bytes)")
                                 except Exception as se:
                                     logging.warning(f"Ingest send error: {se}")
                                     break
@@ -74,6 +79,7 @@ class IngestPublisher:
 
     def stop(self):
         self.stop_flag = True
+        self._event.set()
         try:
             if self.thread and self.thread.is_alive():
                 self.thread.join(timeout=2)
@@ -81,21 +87,16 @@ class IngestPublisher:
             pass
         logging.info("IngestPublisher stopped")
 
-    def enqueue(self, jpeg_bytes: bytes):
+    def active(self) -> bool:
+        """True while the publisher thread is running, i.e. enqueued frames get sent"""
+        return self.thread is not None and self.thread.is_alive() and not self.stop_flag
+
+    def enqueue(self, jpeg_bytes: "bytes | memoryview"):
         if not self.enabled or not self.url or websockets is None:
             return
-        try:
-            self.q.put_nowait(jpeg_bytes)
-        except queue.Full:
-            # Drop oldest to avoid backpressure
-            try:
-                _ = self.q.get_nowait()
-            except Exception:
-                pass
-            try:
-                self.q.put_nowait(jpeg_bytes)
-            except Exception:
-                pass
+        # A full ring evicts its oldest frame, so there is never backpressure
+        self._ring.append(jpeg_bytes)
+        self._event.set()
 
 
 publisher = IngestPublisher()
@@ -0,0 +1,85 @@
+import logging
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# libjpeg-turbo via PyTurboJPEG uses SIMD DCT/Huffman kernels; OpenCV's bundled
+# libjpeg is used when it is not installed
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_GRAY, TJSAMP_420, TJSAMP_GRAY, TJFLAG_FASTDCT
+    _turbo = TurboJPEG()
+except Exception:
+    _turbo = None
+
+# simplejpeg bundles its own libjpeg-turbo build, so it works without the
+# system library PyTurboJPEG needs
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+# NVIDIA GPU encode (pynvjpeg); only used when selected with set_backend('nvjpeg')
+try:
+    from nvjpeg import NvJpeg
+except ImportError:
+    NvJpeg = None
+_nvjpeg = None
+
+# Official opencv-python wheels build libjpeg-turbo; distro builds may link plain libjpeg
+if _turbo is None and simplejpeg is None and 'libjpeg-turbo' not in cv2.getBuildInformation():
+    logging.warning("No libjpeg-turbo JPEG encoder found; install simplejpeg for faster encoding")
+
+
+def set_backend(name: Optional[str]):
+    """Select the encoder: 'nvjpeg' for GPU encoding, anything else for the CPU chain"""
+    global _nvjpeg
+    _nvjpeg = None
+    if name != 'nvjpeg':
+        return
+    if NvJpeg is None:
+        logging.warning("jpeg.backend is nvjpeg but pynvjpeg is not installed; using the CPU encoder")
+        return
+    try:
+        _nvjpeg = NvJpeg()
+        logging.info("JPEG encoding on the GPU via nvJPEG")
+    except Exception as e:
+        logging.warning(f"nvJPEG unavailable, using the CPU encoder: {e}")
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 85, fast: bool = False) -> Optional[bytes]:
+    """Encode a BGR or grayscale frame to JPEG bytes, or None if encoding fails.
+
+    fast selects libjpeg-turbo's faster, slightly less accurate integer DCT;
+    use it for frames only a machine looks at.
+    """
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    gray = channels == 1
+    if _nvjpeg is not None and channels == 3:
+        try:
+            return _nvjpeg.encode(np.ascontiguousarray(image), quality)
+        except Exception as e:
+            logging.warning(f"nvJPEG encode failed, falling back to the CPU encoder: {e}")
+    if _turbo is not None and channels in (1, 3):
+        try:
+            if gray:
+                return _turbo.encode(np.ascontiguousarray(image), quality=quality, pixel_format=TJPF_GRAY,
+                                     jpeg_subsample=TJSAMP_GRAY, flags=TJFLAG_FASTDCT if fast else 0)
+            return _turbo.encode(np.ascontiguousarray(image), quality=quality, pixel_format=TJPF_BGR,
+                                 jpeg_subsample=TJSAMP_420, flags=TJFLAG_FASTDCT if fast else 0)
+        except Exception as e:
+            logging.warning(f"TurboJPEG encode failed, falling back to OpenCV: {e}")
+    elif simplejpeg is not None and channels in (1, 3):
+        try:
+            if gray:
+                # simplejpeg wants an explicit single-channel axis
+                return simplejpeg.encode_jpeg(np.ascontiguousarray(image).reshape(image.shape[0], image.shape[1], 1),
+                                              quality=quality, colorspace='GRAY', fastdct=fast)
+            return simplejpeg.encode_jpeg(np.ascontiguousarray(image), quality=quality,
+                                          colorspace='BGR', colorsubsampling='420', fastdct=fast)
+        except Exception as e:
+            logging.warning(f"simplejpeg encode failed, falling back to OpenCV: {e}")
+    # Contiguous input lets OpenCV hand rows straight to libjpeg; no Huffman optimize pass
+    ok, buffer = cv2.imencode('.jpg', np.ascontiguousarray(image),
+                              [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+    return buffer.tobytes() if ok else None
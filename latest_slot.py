@@ -0,0 +1,27 @@
+import threading
+from typing import Any, Optional
+
+
+class LatestSlot:
+    """Single-slot handoff between a producer and its consumers.
+
+    A new item replaces any unread one, so consumers always get the newest
+    frame and at most one frame is ever held.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+
+    def put(self, item: Any):
+        with self._cond:
+            self._item = item
+            self._cond.notify_all()
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Remove and return the newest item, waiting up to timeout for one"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._item is not None, timeout):
+                return None
+            item, self._item = self._item, None
+            return item
@@ -1,4 +1,5 @@
 import os
+import binascii
 import logging
 from typing import Optional, List
 
@@ -17,8 +18,43 @@ try:
 except Exception:
     anthropic = None
 
+import numpy as np
 from PIL import Image
 
+from frame_cache import FrameCache
+from frame_utils import dhash
+from jpeg_codec import encode_jpeg
+
+
+def _jpeg_bytes(image: Image.Image, bgr: Optional[np.ndarray] = None) -> bytes:
+    """Baseline 4:2:0 JPEG for upload, encoded from the BGR frame when the caller has it.
+
+    jpeg_codec's libjpeg-turbo encoders are several times faster than
+    Pillow's; the PIL path is the fallback for callers with only an image.
+    """
+    if bgr is not None:
+        jpeg = encode_jpeg(bgr, 85)
+        if jpeg is not None:
+            return jpeg
+    import io
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=85, optimize=False, progressive=False, subsampling=2)
+    return buf.getvalue()
+
+
+class JpegUpload:
+    """Base64 JPEG of one frame, encoded on first use and shared by every provider tried"""
+
+    def __init__(self, image: Image.Image, bgr: Optional[np.ndarray] = None):
+        self._image = image
+        self._bgr = bgr
+        self._b64: Optional[str] = None
+
+    def b64(self) -> str:
+        if self._b64 is None:
+            self._b64 = binascii.b2a_base64(_jpeg_bytes(self._image, self._bgr), newline=False).decode("ascii")
+        return self._b64
+
 
 class VisionProvider:
     name: str = "base"
@@ -26,7 +62,8 @@ class VisionProvider:
     def available(self) -> bool:
         return False
 
-    def analyze(self, image: Image.Image, prompt: str) -> Optional[str]:
+    def analyze(self, image: Image.Image, prompt: str, upload: Optional[JpegUpload] = None) -> Optional[str]:
+        """Describe image; upload carries its base64 JPEG when the router already has one"""
         raise NotImplementedError
 
 
@@ -48,7 +85,7 @@ class GeminiVision(VisionProvider):
     def available(self) -> bool:
         return bool(self.api_key and genai is not None)
 
-    def analyze(self, image: Image.Image, prompt: str) -> Optional[str]:
+    def analyze(self, image: Image.Image, prompt: str, upload: Optional[JpegUpload] = None) -> Optional[str]:
         if not self._model:
             return None
         try:
@@ -76,14 +113,11 @@ class OpenAIVision(VisionProvider):
     def available(self) -> bool:
         return bool(self.api_key and OpenAIClient is not None)
 
-    def analyze(self, image: Image.Image, prompt: str) -> Optional[str]:
+    def analyze(self, image: Image.Image, prompt: str, upload: Optional[JpegUpload] = None) -> Optional[str]:
         if not self._client:
             return None
         try:
-            import base64, io
-            buf = io.BytesIO()
-            image.save(buf, format="JPEG")
-            b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+            b64 = (upload or JpegUpload(image)).b64()
 
             resp = self._client.responses.create(
                 model=self.model_id,
@@ -126,14 +160,11 @@ class ClaudeVision(VisionProvider):
     def available(self) -> bool:
         return bool(self.api_key and anthropic is not None)
 
-    def analyze(self, image: Image.Image, prompt: str) -> Optional[str]:
+    def analyze(self, image: Image.Image, prompt: str, upload: Optional[JpegUpload] = None) -> Optional[str]:
         if not self._client:
             return None
         try:
-            import base64, io
-            buf = io.BytesIO()
-            image.save(buf, format="JPEG")
-            b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
+            b64 = (upload or JpegUpload(image)).b64()
             msg = self._client.messages.create(
                 model=self.model_id,
                 max_tokens=300,
@@ -171,14 +202,34 @@ class VisionRouter:
                 self.providers.append(OpenAIVision())
             elif name == "claude":
                 self.providers.append(ClaudeVision())
-
-    def analyze(self, image: Image.Image, prompt: str) -> Optional[str]:
+        # Static scenes get the same description back without a provider call:
+        # keyed on (prompt, dHash), matching frames up to 4 bits apart for 5 minutes.
+        # The only description cache; callers go through it rather than adding their own
+        self.cache = FrameCache(maxsize=128, ttl=300, max_distance=4)
+
+    def analyze(self, image: Image.Image, prompt: str, bgr: Optional[np.ndarray] = None,
+                use_cache: bool = False) -> Optional[str]:
+        """Describe a frame with the first provider that succeeds.
+
+        Only use_cache callers (periodic loops) may be answered from the cache;
+        a small change such as a raised hand can stay within the hash distance,
+        so explicit requests always get a fresh analysis. Every result is
+        still cached for the loops.
+        """
+        key = (prompt, dhash(bgr if bgr is not None else np.asarray(image)))
+        cached = self.cache.get(key) if use_cache else None
+        if cached is not None:
+            logging.info("VisionRouter: reusing cached description for a near-identical frame")
+            return cached
+        # Encoded at most once, and only if a provider that uploads JPEG is reached
+        upload = JpegUpload(image, bgr)
         for provider in self.providers:
             if not provider.available():
                 continue
-            result = provider.analyze(image, prompt)
+            result = provider.analyze(image, prompt, upload)
             if result:
                 logging.info(f"VisionRouter: provider '{provider.name}' succeeded")
+                self.cache.put(key, result)
                 return result
             else:
                 logging.info(f"VisionRouter: provider '{provider.name}' failed, trying next")
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Any, Callable
+
+
+class SingleFlight:
+    """Collapses concurrent calls into one and reuses the result briefly.
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for and share its result, and anyone calling within ttl
+    seconds afterwards gets that result without a new run. clear() drops
+    the cached result; a run already in flight still answers its waiters
+    but is not cached, since it may predate the change being signalled.
+    If the function raises, the error goes to the leader and every waiter
+    and nothing is cached, so the next call runs it again.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight = None
+        self._result = None
+        self._result_ts = 0.0
+        self._generation = 0
+
+    def do(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            if self._result_ts and time.monotonic() - self._result_ts < self.ttl:
+                return self._result
+            call = self._inflight
+            leader = call is None
+            if leader:
+                call = self._inflight = threading.Event()
+                call.result = None
+                call.error = None
+                generation = self._generation
+        if not leader:
+            call.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None and generation == self._generation:
+                    self._result = call.result
+                    self._result_ts = time.monotonic()
+                self._inflight = None
+            call.set()
+        return call.result
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._result = None
+            self._result_ts = 0.0
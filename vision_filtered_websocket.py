@@ -1,14 +1,15 @@
 import cv2
-import base64
+import binascii
 import time
 import threading
-import queue
 import json
 import logging
-import requests
 from flask import Flask
 from flask_socketio import SocketIO, emit
 from corpus_vision import VisionSystem
+from frame_utils import FILTER_SIZE, run_filter
+from latest_slot import LatestSlot
+from jpeg_codec import encode_jpeg
 
 # Import the Rust filter (will be built with maturin)
 try:
@@ -28,22 +29,24 @@ class FilteredVisionWebSocketServer:
         self.filter = None
         self.streaming = False
         self.capture_thread = None
-        self.frame_queue = queue.Queue(maxsize=50)
+        # Newest frame only; the sender never ships a backlog of stale frames
+        self.latest_frame = LatestSlot()
         self.client_count = 0
         self.config = {
             'frame_interval_ms': 33,     # 30fps capture (1000ms/30fps = 33ms)
             'buffer_duration_ms': 100,   # 100ms comparison window  
             'change_threshold': 5.0,     # 5% change to trigger AI
             'filter_enabled': True,      # Use filter or process all frames
-            'resolution': {'width': 3840, 'height': 2160}  # 4K resolution
-        }
-        self.stats = {
-            'frames_captured': 0,
-            'frames_processed': 0,
-            'frames_triggered': 0,
-            'start_time': None,
-            'ai_calls_saved': 0
+            'resolution': {'width': 3840, 'height': 2160},  # 4K resolution
+            'filter_downscale': list(FILTER_SIZE)  # Filter compares thumbnails, not 4K frames
         }
+        # Per-frame counters are plain int attributes bumped by the capture
+        # thread; readers snapshot them into locals
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_triggered = 0
+        self.ai_calls_saved = 0
+        self.start_ns = 0  # time.monotonic_ns() when streaming started
         
     def initialize_systems(self):
         """Initialize vision system and filter"""
@@ -51,10 +54,8 @@ class FilteredVisionWebSocketServer:
             self.vision = VisionSystem()
             
             # Configure camera for 4K resolution
-            if self.vision.camera:
-                self.vision.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.config['resolution']['width'])
-                self.vision.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config['resolution']['height'])
-                self.vision.camera.set(cv2.CAP_PROP_FPS, 30)
+            if self.vision.configure_camera(self.config['resolution']['width'],
+                                            self.config['resolution']['height'], 30):
                 logging.info("Camera configured for 4K @ 30fps")
             
             logging.info("Vision system initialized for filtered WebSocket")
@@ -85,7 +86,7 @@ class FilteredVisionWebSocketServer:
                 return False
         
         self.streaming = True
-        self.stats['start_time'] = time.time()
+        self.start_ns = time.monotonic_ns()
         self._reset_stats()
         
         def filtered_capture_worker():
@@ -101,18 +102,18 @@ class FilteredVisionWebSocketServer:
                         # Capture frame
                         frame = self.vision.capture_image()
                         if frame is not None:
-                            self.stats['frames_captured'] += 1
+                            self.frames_captured += 1
                             
                             # Convert to base64
-                            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                            frame_b64 = base64.b64encode(buffer).decode('utf-8')
+                            buffer = encode_jpeg(frame, 70)
+                            frame_b64 = binascii.b2a_base64(buffer, newline=False).decode('ascii')
                             
-                            # Process through filter
+                            # Process a thumbnail through the filter
                             should_trigger, change_pct, buffer_size = self._process_with_filter(
-                                frame_b64, timestamp_ms
+                                frame, timestamp_ms
                             )
                             
-                            self.stats['frames_processed'] += 1
+                            self.frames_processed += 1
                             
                             # Send frame data to clients
                             frame_data = {
@@ -121,21 +122,18 @@ class FilteredVisionWebSocketServer:
                                 'change_detected': should_trigger,
                                 'change_percentage': change_pct,
                                 'buffer_size': buffer_size,
-                                'frame_number': self.stats['frames_captured']
+                                'frame_number': self.frames_captured
                             }
                             
-                            # Add to queue
-                            try:
-                                self.frame_queue.put(frame_data, block=False)
-                            except queue.Full:
-                                pass
+                            # Replaces any frame the sender has not picked up yet
+                            self.latest_frame.put(frame_data)
                             
                             # Trigger AI analysis if filter says so
                             if should_trigger:
-                                self.stats['frames_triggered'] += 1
+                                self.frames_triggered += 1
                                 self._trigger_ai_analysis(frame_b64, timestamp_ms)
                             else:
-                                self.stats['ai_calls_saved'] += 1
+                                self.ai_calls_saved += 1
                         
                         last_capture = current_time
                     except Exception as e:
@@ -150,11 +148,11 @@ class FilteredVisionWebSocketServer:
         logging.info(f"Started filtered stream at {1000/self.config['frame_interval_ms']:.1f} fps")
         return True
     
-    def _process_with_filter(self, frame_b64: str, timestamp_ms: int) -> tuple:
+    def _process_with_filter(self, frame, timestamp_ms: int) -> tuple:
         """Process frame through Rust filter"""
         if self.filter and self.config['filter_enabled']:
             try:
-                return self.filter.process_frame(frame_b64, timestamp_ms)
+                return run_filter(self.filter, frame, timestamp_ms, self.config['filter_downscale'])
             except Exception as e:
                 logging.error(f"Filter processing error: {e}")
                 return (True, 100.0, 0)  # Fail-safe: trigger AI if filter fails
@@ -167,7 +165,7 @@ class FilteredVisionWebSocketServer:
         def ai_worker():
             try:
                 # Decode frame for AI analysis
-                img_data = base64.b64decode(frame_b64)
+                img_data = binascii.a2b_base64(frame_b64)
                 nparr = np.frombuffer(img_data, np.uint8)
                 frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
                 
@@ -194,7 +192,7 @@ class FilteredVisionWebSocketServer:
         """Send description to speech API"""
         try:
             speech_url = self.vision.config['speech']['speech_api_url']
-            response = requests.post(
+            response = self.vision.speech_session.post(
                 f"{speech_url}/speak",
                 json={'text': description},
                 timeout=5
@@ -211,31 +209,33 @@ class FilteredVisionWebSocketServer:
         logging.info("Filtered stream stopped")
     
     def get_latest_frame(self):
-        """Get latest frame from queue"""
-        try:
-            return self.frame_queue.get_nowait()
-        except queue.Empty:
-            return None
+        """Take the newest unsent frame, waiting briefly for one"""
+        return self.latest_frame.take(timeout=0.1)
     
     def _reset_stats(self):
         """Reset statistics"""
-        for key in ['frames_captured', 'frames_processed', 'frames_triggered', 'ai_calls_saved']:
-            self.stats[key] = 0
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_triggered = 0
+        self.ai_calls_saved = 0
     
     def get_performance_stats(self):
         """Get performance metrics"""
-        if self.stats['start_time']:
-            uptime = time.time() - self.stats['start_time']
-            capture_fps = self.stats['frames_captured'] / uptime if uptime > 0 else 0
-            trigger_rate = (self.stats['frames_triggered'] / self.stats['frames_processed'] * 100) if self.stats['frames_processed'] > 0 else 0
+        if self.start_ns:
+            captured, processed, triggered, saved = (
+                self.frames_captured, self.frames_processed, self.frames_triggered, self.ai_calls_saved
+            )
+            uptime = (time.monotonic_ns() - self.start_ns) / 1e9
+            capture_fps = captured / uptime if uptime > 0 else 0
+            trigger_rate = (triggered / processed * 100) if processed > 0 else 0
             
             return {
                 'uptime_seconds': uptime,
                 'capture_fps': round(capture_fps, 1),
-                'frames_captured': self.stats['frames_captured'],
-                'frames_processed': self.stats['frames_processed'],
-                'ai_triggers': self.stats['frames_triggered'],
-                'ai_calls_saved': self.stats['ai_calls_saved'],
+                'frames_captured': captured,
+                'frames_processed': processed,
+                'ai_triggers': triggered,
+                'ai_calls_saved': saved,
                 'trigger_rate_percent': round(trigger_rate, 1),
                 'filter_enabled': self.config['filter_enabled'],
                 'change_threshold': self.config['change_threshold']
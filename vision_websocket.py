@@ -1,25 +1,42 @@
-import cv2
-import base64
+import os
+
+# Opt-in green-thread server for fanning frames out to many clients
+# (SOCKETIO_ASYNC_MODE=eventlet); patching must precede every other import
+ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE') or None
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+import binascii
 import time
 import threading
-import queue
 import json
 import logging
 from flask import Flask
 from flask_socketio import SocketIO, emit
 from corpus_vision import VisionSystem
+from frame_utils import encode_ppm
+from latest_slot import LatestSlot
+
+# 'jpeg' sends base64 text, or JPEG bytes when the client asks for binary
+# frames; 'ppm' sends uncompressed binary frames for LAN clients where encode
+# time matters more than bandwidth
+FRAME_FORMATS = ('jpeg', 'ppm')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'corpus-vision-websocket'
-socketio = SocketIO(app, cors_allowed_origins="*", ping_timeout=60, ping_interval=25)
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, ping_timeout=60, ping_interval=25)
 
 class VisionWebSocketServer:
     def __init__(self):
         self.vision = None
         self.streaming = False
         self.capture_thread = None
-        self.frame_queue = queue.Queue(maxsize=10)
+        # Newest frame only; the sender never ships a backlog of stale frames
+        self.latest_frame = LatestSlot()
         self.client_count = 0
+        self.frame_format = 'jpeg'
+        self.binary_frames = False
         self.stats = {
             'frames_captured': 0,
             'frames_sent': 0,
@@ -37,7 +54,19 @@ class VisionWebSocketServer:
             logging.error(f"Failed to initialize vision system: {e}")
             return False
     
-    def start_frame_capture(self, interval_ms=20):
+    def _encode_frame(self):
+        """Capture one frame as the payload for the configured frame_format"""
+        if self.frame_format == 'jpeg':
+            buffer = self.vision.capture_jpeg(80)
+            if buffer is None or self.binary_frames:
+                return buffer
+            return binascii.b2a_base64(buffer, newline=False).decode('ascii')
+        frame = self.vision.capture_image()
+        if frame is None:
+            return None
+        return encode_ppm(frame)
+    
+    def start_frame_capture(self, interval_ms=20, frame_format='jpeg', binary=False):
         """Start capturing frames at specified interval (default 20ms = 50fps)"""
         if self.streaming:
             logging.warning("Frame capture already running")
@@ -47,6 +76,8 @@ class VisionWebSocketServer:
             if not self.initialize_vision():
                 return False
         
+        self.frame_format = frame_format
+        self.binary_frames = binary
         self.streaming = True
         self.stats['start_time'] = time.time()
         self.stats['frames_captured'] = 0
@@ -62,24 +93,17 @@ class VisionWebSocketServer:
                 # Maintain consistent frame rate
                 if current_time - last_capture >= interval:
                     try:
-                        frame = self.vision.capture_image()
-                        if frame is not None:
-                            # Convert frame to base64
-                            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                            frame_b64 = base64.b64encode(buffer).decode('utf-8')
-                            
-                            # Add to queue (non-blocking)
-                            try:
-                                self.frame_queue.put({
-                                    'timestamp': current_time,
-                                    'frame': frame_b64,
-                                    'frame_number': self.stats['frames_captured']
-                                }, block=False)
-                                
-                                self.stats['frames_captured'] += 1
-                            except queue.Full:
-                                # Skip frame if queue is full
-                                pass
+                        payload = self._encode_frame()
+                        if payload is not None:
+                            # Replaces any frame the sender has not picked up yet
+                            self.latest_frame.put({
+                                'timestamp': current_time,
+                                'frame': payload,
+                                'format': self.frame_format,
+                                'binary': self.binary_frames or self.frame_format != 'jpeg',
+                                'frame_number': self.stats['frames_captured']
+                            })
+                            self.stats['frames_captured'] += 1
                         
                         last_capture = current_time
                     except Exception as e:
@@ -102,11 +126,8 @@ class VisionWebSocketServer:
         logging.info("Frame capture stopped")
     
     def get_latest_frame(self):
-        """Get latest frame from queue"""
-        try:
-            return self.frame_queue.get_nowait()
-        except queue.Empty:
-            return None
+        """Take the newest unsent frame, waiting briefly for one"""
+        return self.latest_frame.take(timeout=0.1)
     
     def calculate_fps(self):
         """Calculate actual FPS"""
@@ -138,12 +159,20 @@ def handle_start_stream(data=None):
     """Start real-time frame streaming"""
     config = data or {}
     interval_ms = config.get('interval_ms', 20)  # Default 20ms = 50fps
+    frame_format = config.get('frame_format', 'jpeg')
+    # Binary JPEG skips base64 (~33% smaller); off by default for existing clients
+    binary = bool(config.get('binary', False))
+    if frame_format not in FRAME_FORMATS:
+        emit('error', {'message': f"frame_format must be one of {', '.join(FRAME_FORMATS)}"})
+        return
     
-    if vision_ws.start_frame_capture(interval_ms):
+    if vision_ws.start_frame_capture(interval_ms, frame_format, binary):
         emit('stream_started', {
             'status': 'success', 
             'message': f'Frame capture started at {1000/interval_ms:.1f} fps',
-            'interval_ms': interval_ms
+            'interval_ms': interval_ms,
+            'frame_format': frame_format,
+            'binary': binary
         })
         
         # Start frame sender
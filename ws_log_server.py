@@ -41,7 +41,8 @@ class WaldoLogWebSocketHub:
             await asyncio.gather(*coros, return_exceptions=True)
 
     def broadcast(self, payload: dict):
-        if not self.loop:
+        # Nobody listening: skip the JSON encode and the cross-thread hop
+        if not self.loop or not self.clients:
             return
         try:
             msg = json.dumps(payload, ensure_ascii=False)